@@ -8,6 +8,16 @@ class Config:
     ENV = os.getenv("ENV", "STAGE").upper()
     BASE_URL = os.getenv("BASE_URL", "https://www.insiderone.com")
     TIMEOUT = int(os.getenv("TIMEOUT", 10))
+    # Implicit wait stays 0: all waits are explicit (WaitEngine), otherwise every negative poll stalls.
+    IMPLICIT_WAIT = int(os.getenv("IMPLICIT_WAIT", 0))
+    # Elements that may never appear (cookie banner etc.)
+    OPTIONAL_WAIT_TIMEOUT = float(os.getenv("OPTIONAL_WAIT_TIMEOUT", 3))
+    # Explicit wait polling: starts at WAIT_POLL seconds, multiplied by WAIT_BACKOFF up to WAIT_POLL_MAX
+    WAIT_POLL = float(os.getenv("WAIT_POLL", 0.1))
+    WAIT_BACKOFF = float(os.getenv("WAIT_BACKOFF", 1.5))
+    WAIT_POLL_MAX = float(os.getenv("WAIT_POLL_MAX", 1.0))
+    # DOM is considered settled after this many ms without mutations/network activity
+    DOM_QUIET_MS = int(os.getenv("DOM_QUIET_MS", 500))
 
     # --- PLATFORM SELECTION ---
     # Options: 'web' (default), 'android', 'ios'
@@ -17,6 +27,25 @@ class Config:
     BROWSER = os.getenv("BROWSER", "chrome").lower()
     HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
 
+    # --- SCREENSHOT POLICY ---
+    # Options: 'always' (attach every step, default), 'last_n' (ring buffer of frames, attached on failure),
+    # 'on_failure' (no step captures, only the final error screenshot + step trail)
+    SCREENSHOT_POLICY = os.getenv("SCREENSHOT_POLICY", "always").lower()
+    SCREENSHOT_BUFFER_SIZE = int(os.getenv("SCREENSHOT_BUFFER_SIZE", 5))
+
+    # --- SCREENSHOT PIPELINE (requires Pillow) ---
+    # Options: 'png' (original, default), 'webp', 'jpeg'
+    SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "png").lower()
+    SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", 70))
+    # Downscale to this width in pixels (0 = keep original size)
+    SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", 0))
+    # Drop frames that look the same as the previous one (perceptual hash distance in bits)
+    SCREENSHOT_DEDUPE = os.getenv("SCREENSHOT_DEDUPE", "false").lower() == "true"
+    SCREENSHOT_DEDUPE_DISTANCE = int(os.getenv("SCREENSHOT_DEDUPE_DISTANCE", 0))
+    # Options: 'full' (default, 1920x1080 + VNC), 'lean' (eager load, no images/fonts/VNC, 1366x768),
+    # 'headless-fast' (lean + headless, 1280x720)
+    BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "full").lower()
+
     # --- MOBILE SETTINGS ---
     MOBILE_APP_PATH = os.getenv("MOBILE_APP_PATH")
     MOBILE_DEVICE_NAME = os.getenv("MOBILE_DEVICE_NAME", "Android Emulator")
@@ -24,8 +53,95 @@ class Config:
 
     # --- SELENOID SETTINGS ---
     RECORD_VIDEO = os.getenv("RECORD_VIDEO", "on_failure").lower()
+    # Session end: max seconds to wait for all video containers to be destroyed (one shared event stream)
+    VIDEO_CLEANUP_TIMEOUT = float(os.getenv("VIDEO_CLEANUP_TIMEOUT", 120))
     SELENIUM_REMOTE_URL = os.getenv("SELENIUM_REMOTE_URL")
+    # Overridden by tests/conftest.py with pytest's --alluredir, so every artifact lands next to the results
+    ALLURE_RESULTS_DIR = os.getenv("ALLURE_RESULTS_DIR", "/app/allure-results")
+    # Record every remote WebDriver command (name, latency, payload size) per test
+    TRACE_COMMANDS = os.getenv("TRACE_COMMANDS", "false").lower() == "true"
+
+    # --- TEST SCHEDULING (xdist) ---
+    # Options: 'duration' (longest tests first, from .pytest_cache history), 'default' (xdist load)
+    TEST_SCHEDULER = os.getenv("TEST_SCHEDULER", "duration").lower()
+
+    # --- TEST IMPACT SELECTION ---
+    # Options: 'off' (default), 'record' (trace which pages/locators/utilities each test uses),
+    # 'select' (run only the tests affected by the changes)
+    IMPACT_MODE = os.getenv("IMPACT_MODE", "off").lower()
+    # Git ref to diff against in 'select' mode (empty = compare with the files of the last recording run)
+    IMPACT_BASE = os.getenv("IMPACT_BASE", "")
+
+    # --- SHARED COMMAND EXECUTOR (HTTP to Selenoid/Appium, one keep-alive pool per worker) ---
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 4))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 120))
+    # Retries only for connection failures/resets, never for read timeouts
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+    HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", 0.2))
+
+    # --- SESSION POOL SETTINGS ---
+    # Options: 'fresh' (new session per test, default), 'reuse' (warm session per xdist worker)
+    SESSION_MODE = os.getenv("SESSION_MODE", "fresh").lower()
+    # A reused session is recycled after this many tests (or after any failure)
+    SESSION_MAX_USES = int(os.getenv("SESSION_MAX_USES", 20))
+    # Create the next session during the current test and tear down in the background.
+    # Note: Each worker may briefly hold 2 sessions, keep Selenoid '-limit' >= 2 x WORKER_COUNT.
+    # The spare idles for a whole test: Selenoid '-timeout' (SELENOID_SESSION_TIMEOUT, docker-compose.yml) must cover the longest test.
+    SESSION_PREFETCH = os.getenv("SESSION_PREFETCH", "false").lower() == "true"
+
+    # --- CAPACITY ---
+    # Options: 'static' (fixed worker count per architecture, default), 'auto' (start_tests.py sizes xdist
+    # workers and the Selenoid limit from CPUs, free memory, browsers_*.json 'mem' and live Selenoid status)
+    CAPACITY_MODE = os.getenv("CAPACITY_MODE", "static").lower()
+    # Memory per browser session in MB (0 = 'mem' from browsers_*.json or built-in estimate)
+    BROWSER_MEMORY_MB = int(os.getenv("BROWSER_MEMORY_MB", 0))
+    # Memory kept free for the OS, Selenoid and the pytest container
+    HOST_RESERVE_MB = int(os.getenv("HOST_RESERVE_MB", 2048))
+    # Status endpoint of an already running (shared) Selenoid, e.g. http://localhost:4444/status
+    SELENOID_STATUS_URL = os.getenv("SELENOID_STATUS_URL", "")
+    # Runtime gate: lower the number of concurrent sessions when session creation gets slow
+    CAPACITY_CONTROL = os.getenv("CAPACITY_CONTROL", "false").lower() == "true"
+    SESSION_LATENCY_TARGET = float(os.getenv("SESSION_LATENCY_TARGET", 10))
+    CAPACITY_WAIT_TIMEOUT = float(os.getenv("CAPACITY_WAIT_TIMEOUT", 300))
+
+    # --- NETWORK RULES (Request Blocking) ---
+    # Master switch: enables page object / marker rules and blocked vs allowed request stats.
+    NETWORK_RULES = os.getenv("NETWORK_RULES", "false").lower() == "true"
+    # Comma separated URL patterns for the whole run. 'third_party' = built-in analytics/chat/tracker list.
+    NETWORK_BLOCK = [p.strip() for p in os.getenv("NETWORK_BLOCK", "").split(",") if p.strip()]
+    NETWORK_ALLOW = [p.strip() for p in os.getenv("NETWORK_ALLOW", "").split(",") if p.strip()]
     
+    # --- AI FAILURE ANALYSIS ---
+    # Offline rule classifier before the LLM; team rules in AI_RULES_FILE (JSON) are checked first
+    AI_RULES = os.getenv("AI_RULES", "true").lower() == "true"
+    AI_RULES_FILE = os.getenv("AI_RULES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "failure_rules.json"))
+    # Prompt payload budget (~4 chars per token): exception chain, failing step, locator, frames, DOM excerpt
+    AI_CONTEXT_TOKENS = int(os.getenv("AI_CONTEXT_TOKENS", 600))
+    # Adds a cleaned DOM excerpt around the failing locator (one extra browser round trip per failure)
+    AI_CONTEXT_DOM = os.getenv("AI_CONTEXT_DOM", "true").lower() == "true"
+    # Deadline per provider call in seconds (AI_PROVIDER=all/first query providers concurrently)
+    AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", 60))
+    # 429/5xx retries with jittered exponential backoff (base seconds)
+    AI_RETRIES = int(os.getenv("AI_RETRIES", 3))
+    AI_RETRY_BACKOFF = float(os.getenv("AI_RETRY_BACKOFF", 1.0))
+    # Whole-run limits shared by all xdist workers (0 = unlimited)
+    AI_MAX_CALLS = int(os.getenv("AI_MAX_CALLS", 50))
+    AI_TOKEN_BUDGET = int(os.getenv("AI_TOKEN_BUDGET", 200000))
+    AI_RATE_LIMIT = int(os.getenv("AI_RATE_LIMIT", 20))  # requests per minute
+    # Seconds a worker waits at session end for queued analyses (the rest is skipped)
+    AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", 180))
+    # Reuse analyses of the same failure signature (per provider + model), shared by workers and runs
+    AI_CACHE = os.getenv("AI_CACHE", "true").lower() == "true"
+    AI_CACHE_DIR = os.getenv("AI_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pytest_cache", "ai_analysis"))
+    AI_CACHE_TTL_HOURS = float(os.getenv("AI_CACHE_TTL_HOURS", 168))
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 500))
+    # Triage page of all failures/analyses (allure-results/ai-triage.html), entries per lazy-loaded page
+    TRIAGE_DASHBOARD = os.getenv("TRIAGE_DASHBOARD", "true").lower() == "true"
+    TRIAGE_PAGE_SIZE = int(os.getenv("TRIAGE_PAGE_SIZE", 100))
+    # Estimated cost on the triage page, USD per 1K tokens (e.g. "gemini=0.0005,openai=0.005")
+    AI_TOKEN_PRICES = os.getenv("AI_TOKEN_PRICES", "")
+
     # --- DATABASE: NoSQL (ARANGO) ---
     ARANGO_URL = os.getenv("ARANGO_URL", "http://localhost:8529")
     ARANGO_DB = os.getenv("ARANGO_DB_NAME", "_system")
@@ -1,23 +1,101 @@
 # pages/base_page.py:
 
+import json
 import logging
 import allure
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from allure_commons.types import AttachmentType
 from config import Config
+from utilities.network_rules import NetworkRules
+from utilities.screenshot_buffer import ScreenshotBuffer
+from utilities.wait_engine import WaitEngine
+
+# One round trip for a whole list: rows and their fields are read inside the browser.
+SNAPSHOT_ROWS_JS = """
+const [rowLocator, fields] = arguments;
+function findAll(locator, context) {
+    const [strategy, value] = locator;
+    if (strategy === 'xpath') {
+        const result = document.evaluate(value, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+        return nodes;
+    }
+    return Array.from(context.querySelectorAll(value));
+}
+return findAll(rowLocator, document).map(row => {
+    const record = {};
+    for (const [name, locator] of fields) {
+        const element = findAll(locator, row)[0];
+        record[name] = element ? (element.innerText || element.textContent || '').trim() : null;
+    }
+    return record;
+});
+"""
+
+# Resolves once the target subtree had no DOM mutation (and, with 'watchNetwork', no fetch/XHR/resource
+# activity) for 'quietMs'. Network tracker is installed once per document.
+DOM_SETTLED_JS = """
+const [target, quietMs, timeoutMs, watchNetwork] = arguments;
+const done = arguments[arguments.length - 1];
+const root = target || document.documentElement;
+if (!window.__qaNet) {
+    const net = window.__qaNet = {pending: 0, last: performance.now()};
+    const bump = () => { net.last = performance.now(); };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function () {
+            net.pending++; bump();
+            return originalFetch.apply(this, arguments).finally(() => { net.pending--; bump(); });
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        net.pending++; bump();
+        this.addEventListener('loadend', () => { net.pending--; bump(); });
+        return originalSend.apply(this, arguments);
+    };
+    try { new PerformanceObserver(bump).observe({type: 'resource'}); } catch (e) {}
+}
+const net = window.__qaNet;
+const start = performance.now();
+let lastMutation = start;
+const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+observer.observe(root, {childList: true, subtree: true, attributes: true, characterData: true});
+(function check() {
+    const now = performance.now();
+    const quietFor = now - (watchNetwork ? Math.max(lastMutation, net.last) : lastMutation);
+    if ((!watchNetwork || net.pending <= 0) && quietFor >= quietMs) {
+        observer.disconnect();
+        return done({settled: true, elapsed: Math.round(now - start)});
+    }
+    if (now - start >= timeoutMs) {
+        observer.disconnect();
+        return done({settled: false, elapsed: Math.round(now - start), pending: net.pending});
+    }
+    setTimeout(check, 50);
+})();
+"""
 
 class BasePage:
+    # Declarative request rules for this page (URL patterns, 'third_party' = built-in tracker list).
+    # Active only when NETWORK_RULES=true.
+    NETWORK_BLOCK = ()
+    NETWORK_ALLOW = ()
+
     def __init__(self, driver):
         self.driver = driver
         # BEST PRACTICE: Creates dynamic logger using Class name.
         # Ex: If using LoginPage, logs will show [LoginPage].
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def find(self, locator):
-        return WebDriverWait(self.driver, Config.TIMEOUT).until(
-            EC.visibility_of_element_located(locator)
-        )
+    def find(self, locator, timeout=None):
+        return WaitEngine.until(self.driver, EC.visibility_of_element_located(locator), timeout, label=locator)
+
+    def find_optional(self, condition, label, timeout=None):
+        """For elements that may legitimately never appear (banners, popups). Returns None instead of raising."""
+        return WaitEngine.optional(self.driver, condition, timeout, label=label)
 
     @allure.step("Clicking on: {locator}")
     def click(self, locator):
@@ -38,6 +116,90 @@ class BasePage:
         log_text = "*****" if "password" in str(locator).lower() else text
         self.logger.info(f"TYPED: '{log_text}' -> {locator}")
 
+    def wait_for_dom_settled(self, locator=None, quiet_ms=None, timeout=None, network=True):
+        """
+        Event-driven replacement for fixed sleeps: returns as soon as the target subtree
+        (whole document if no locator) and the network have been quiet for 'quiet_ms'.
+        network=False: only the subtree counts (page-wide traffic such as analytics beacons,
+        chat widgets and carousels would keep the wait busy until the timeout).
+        Returns True if settled, False on timeout (logged, not raised).
+        """
+        quiet_ms = quiet_ms if quiet_ms is not None else Config.DOM_QUIET_MS
+        timeout = timeout if timeout is not None else Config.TIMEOUT
+
+        target = None
+        if locator:
+            target = WaitEngine.until(self.driver, EC.presence_of_element_located(locator), timeout, label=locator)
+
+        # Async script must be allowed to outlive the wait itself (set once per session)
+        if getattr(self.driver, "dom_wait_script_timeout", 0) < timeout + 5:
+            self.driver.set_script_timeout(timeout + 5)
+            self.driver.dom_wait_script_timeout = timeout + 5
+
+        result = self.driver.execute_async_script(DOM_SETTLED_JS, target, quiet_ms, timeout * 1000, network)
+        if result.get("settled"):
+            self.logger.info(f"DOM SETTLED in {result['elapsed']}ms <- {locator or 'document'}")
+            return True
+
+        self.logger.warning(f"DOM did not settle in {timeout}s (pending requests: {result.get('pending')}) <- {locator or 'document'}")
+        return False
+
+    def wait_for_option(self, select_locator, visible_text, timeout=None):
+        """Waits until a <select> contains an option with the given visible text (handles re-rendering)."""
+        timeout = timeout if timeout is not None else Config.TIMEOUT
+
+        def option_present(driver):
+            element = driver.find_element(*select_locator)
+            return element if driver.execute_script(
+                "return Array.from(arguments[0].options).some(o => o.text.trim() === arguments[1]);",
+                element, visible_text
+            ) else False
+
+        return WaitEngine.until(
+            self.driver, option_present, timeout,
+            label=f"option '{visible_text}' in {select_locator}",
+            ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+        )
+
+    def open(self, url):
+        """Applies the page's network rules, then navigates."""
+        NetworkRules.apply(self.driver, Config, self.NETWORK_BLOCK, self.NETWORK_ALLOW)
+        self.driver.get(url)
+        self.logger.info(f"OPENED: {url}")
+
+    def snapshot_rows(self, row_locator, fields):
+        """
+        Bulk-reads a list in a single execute_script call.
+        row_locator: Locator of each row (e.g. job item).
+        fields: {"name": sub_locator} evaluated relative to each row.
+        Returns: [{"name": "text" or None}, ...] as plain Python records.
+        """
+        rows = self.driver.execute_script(
+            SNAPSHOT_ROWS_JS,
+            self._to_js_locator(row_locator),
+            [[name, self._to_js_locator(locator)] for name, locator in fields.items()],
+        )
+        self.logger.info(f"SNAPSHOT: {len(rows)} row(s) x {len(fields)} field(s) <- {row_locator}")
+        return rows
+
+    @staticmethod
+    def _to_js_locator(locator):
+        """Translates a Selenium (By, value) tuple to ['xpath' | 'css', value] for snapshot_rows."""
+        by, value = locator
+        if by == By.XPATH:
+            return ["xpath", value]
+        if by == By.CSS_SELECTOR:
+            return ["css", value]
+        if by == By.ID:
+            return ["css", f"[id={json.dumps(value)}]"]
+        if by == By.NAME:
+            return ["css", f"[name={json.dumps(value)}]"]
+        if by == By.CLASS_NAME:
+            return ["css", f".{value}"]
+        if by == By.TAG_NAME:
+            return ["css", value]
+        raise ValueError(f"❌ Unsupported locator strategy for snapshot: {by}")
+
     def get_url(self):
         url = self.driver.current_url
         self.logger.info(f"URL RETRIEVED: {url}")
@@ -45,9 +207,5 @@ class BasePage:
 
     # --- HELPER METHOD ---
     def take_screenshot(self, name):
-        """Centralized function that attaches a screenshot to the report"""
-        allure.attach(
-            self.driver.get_screenshot_as_png(),
-            name=name,
-            attachment_type=AttachmentType.PNG
-        )
\ No newline at end of file
+        """Centralized function that captures a screenshot according to SCREENSHOT_POLICY"""
+        ScreenshotBuffer.capture(self.driver, name)
\ No newline at end of file
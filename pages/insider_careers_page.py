@@ -1,51 +1,42 @@
-import time
 import allure
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select 
 from pages.base_page import BasePage
 from locators.insider_locators import InsiderLocators
+from utilities.wait_engine import WaitEngine
 
 class InsiderCareersPage(BasePage):
+    NETWORK_BLOCK = ("third_party",)
     
     @allure.step("Navigate to QA Careers Page")
     def load_qa_page(self):
-        self.driver.get("https://insiderone.com/careers/quality-assurance/")
+        self.open("https://insiderone.com/careers/quality-assurance/")
         self.take_screenshot("QA Careers Page Loaded")
 
     @allure.step("Click 'See all QA jobs'")
     def click_see_all_jobs(self):
         self.click(InsiderLocators.SEE_ALL_JOBS_BTN)
-        time.sleep(2)
+        self.find(InsiderLocators.LOCATION_FILTER_DROPDOWN)
+        # Only the job list matters here; the rest of the page (carousels, widgets, beacons) never goes quiet
+        self.wait_for_dom_settled(InsiderLocators.JOB_LIST_CONTAINER, timeout=5, network=False)
         self.take_screenshot("Jobs List Page Opened")
 
     def try_select_dropdown(self, locator, visible_text, timeout=20):
         """
-        Dropdown selection function with a retry mechanism to handle 
-        database latency (delayed data loading).
+        Dropdown selection that waits for the option to be loaded
+        (handles database latency / delayed data loading without polling sleeps).
         """
-        end_time = time.time() + timeout
-        last_exception = None
-        
         self.logger.info(f"Waiting for dropdown option: '{visible_text}'")
         
-        while time.time() < end_time:
-            try:
-                dropdown_element = self.find(locator)
-                
-                select = Select(dropdown_element)
-                
-                select.select_by_visible_text(visible_text)
-                
-                self.logger.info(f"Successfully selected: {visible_text}")
-                return
-                
-            except Exception as e:
-                last_exception = e
-                time.sleep(1)
-        
-        self.take_screenshot(f"FAIL - Dropdown Selection {visible_text}")
-        raise Exception(f"Could not select '{visible_text}' after {timeout} seconds! Last error: {last_exception}")
+        try:
+            dropdown_element = self.wait_for_option(locator, visible_text, timeout)
+            Select(dropdown_element).select_by_visible_text(visible_text)
+        except Exception as e:
+            self.take_screenshot(f"FAIL - Dropdown Selection {visible_text}")
+            raise Exception(f"Could not select '{visible_text}' after {timeout} seconds! Last error: {e}")
+
+        self.logger.info(f"Successfully selected: {visible_text}")
 
     @allure.step("Filter Jobs: Location={location}, Dept={department}")
     def apply_filters(self, location, department):
@@ -58,27 +49,39 @@ class InsiderCareersPage(BasePage):
         self.try_select_dropdown(InsiderLocators.DEPARTMENT_FILTER_DROPDOWN, department)
         self.take_screenshot(f"Department Selected: {department}")
 
-        self.logger.warning("Waiting 5s for job list update (UI Lag Workaround)...")
-        time.sleep(5)
+        # Job list re-renders after filtering: wait until it stops changing (page beacons never go quiet)
+        self.wait_for_dom_settled(InsiderLocators.JOB_LIST_CONTAINER, timeout=5, network=False)
         self.take_screenshot("Filters Applied Result")
 
     @allure.step("Verify Job List Content (STRICT)")
     def verify_jobs_content(self, expected_position, expected_dept, expected_location):
-        WebDriverWait(self.driver, 20).until(
-            EC.presence_of_element_located(InsiderLocators.JOB_ITEM)
+        WaitEngine.until(
+            self.driver, EC.presence_of_element_located(InsiderLocators.JOB_ITEM), 20, label=InsiderLocators.JOB_ITEM
         )
         
         self.logger.info(f"Checking if list matches '{expected_location}'...")
         try:
-            WebDriverWait(self.driver, 10).until(
-                lambda d: any(expected_location in job.text for job in d.find_elements(*InsiderLocators.JOB_ITEM))
+            # One round trip per poll (snapshot) instead of one per job
+            WaitEngine.until(
+                self.driver,
+                lambda d: any(
+                    expected_location in (job["location"] or "")
+                    for job in self.snapshot_rows(InsiderLocators.JOB_ITEM, {"location": InsiderLocators.JOB_LOCATION})
+                ),
+                10,
+                label=f"job list location '{expected_location}'",
             )
         except Exception:
             self.logger.warning("Smart Wait Timeout: List might not have updated fully yet.")
 
         self.take_screenshot("Job List Visible & Updated")
         
-        jobs = self.driver.find_elements(*InsiderLocators.JOB_ITEM)
+        # Single round trip for all rows instead of scroll + 3 lookups per row
+        jobs = self.snapshot_rows(InsiderLocators.JOB_ITEM, {
+            "position": InsiderLocators.JOB_POSITION_TITLE,
+            "department": InsiderLocators.JOB_DEPARTMENT,
+            "location": InsiderLocators.JOB_LOCATION,
+        })
         
         if not jobs:
             self.take_screenshot("FAIL - No Jobs Found")
@@ -87,11 +90,9 @@ class InsiderCareersPage(BasePage):
         self.logger.info(f"Found {len(jobs)} jobs. STRICT validation starting...")
 
         for index, job in enumerate(jobs):
-            self.driver.execute_script("arguments[0].scrollIntoView();", job)
-            
-            pos_title = job.find_element(*InsiderLocators.JOB_POSITION_TITLE).text
-            dept_text = job.find_element(*InsiderLocators.JOB_DEPARTMENT).text
-            loc_text = job.find_element(*InsiderLocators.JOB_LOCATION).text
+            pos_title = job["position"] or ""
+            dept_text = job["department"] or ""
+            loc_text = job["location"] or ""
             
             self.logger.info(f"Job {index+1}: {pos_title} | {dept_text} | {loc_text}")
 
@@ -118,14 +119,17 @@ class InsiderCareersPage(BasePage):
         self.take_screenshot("Before Clicking View Role")
         view_btn.click()
         
-        WebDriverWait(self.driver, 10).until(EC.number_of_windows_to_be(2))
+        WaitEngine.until(self.driver, EC.number_of_windows_to_be(2), 10, label="new window")
         
         for window_handle in self.driver.window_handles:
             if window_handle != original_window:
                 self.driver.switch_to.window(window_handle)
                 break
         
-        time.sleep(2)
+        try:
+            WaitEngine.until(self.driver, EC.url_contains("lever.co"), 10, label="lever.co redirect")
+        except TimeoutException:
+            pass  # Assertion below reports the actual URL
         current_url = self.driver.current_url
         self.take_screenshot("Redirected Page (Lever)")
         
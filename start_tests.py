@@ -168,8 +168,19 @@ def main():
         print(f"❌ ERROR: Architecture not recognized ({arch}).")
         sys.exit(1)
 
-    # --- 2. EXECUTION ---
+    # --- 2. CAPACITY (CAPACITY_MODE=auto) ---
+    selenoid_limit = "10"
+    if os.getenv("CAPACITY_MODE", "static").lower() == "auto":
+        from utilities.capacity_planner import CapacityPlanner
+        plan = CapacityPlanner.plan(Path(__file__).parent / "config" / browsers_json)
+        auto_worker_count = str(plan["workers"])
+        selenoid_limit = str(plan["selenoid_limit"])
+        print(f"   📐 Capacity: {plan['cpus']} CPU | {plan['memory_mb']} MB free | {plan['session_mb']} MB/session")
+        print(f"   📐 Budgets -> CPU: {plan['cpu_budget']} | Memory: {plan['memory_budget']} | Selenoid free: {plan['selenoid_free']}")
+
+    # --- 3. EXECUTION ---
     final_worker_count = os.getenv("WORKER_COUNT", auto_worker_count)
+    final_selenoid_limit = os.getenv("SELENOID_LIMIT", selenoid_limit)
     
     # --- CLEANUP POLICY ---
     is_ci = os.getenv("CI", "false").lower() == "true"
@@ -187,11 +198,13 @@ def main():
             print(f"   ⚠️ MANUAL SETTING: Worker count set to {final_worker_count}.")
         else:
             print(f"   ⚡ Auto Worker: {final_worker_count}")
+        print(f"   🚦 Selenoid Limit : {final_selenoid_limit}")
         
         env = os.environ.copy()
         env["BROWSERS_JSON"] = browsers_json
         env["VIDEO_RECORDER_IMAGE"] = video_image
         env["WORKER_COUNT"] = final_worker_count
+        env["SELENOID_LIMIT"] = final_selenoid_limit
         
         exit_code = 1 # Default error code
         user_aborted = False # Track user interruption
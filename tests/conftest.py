@@ -1,14 +1,23 @@
 import pytest
 import allure
+import os
+import json
 import logging
-import uuid
 from config import Config
 from utilities.arangoDB_client import DBClient
 from utilities.postgreDB_client import SQLClient 
-from utilities.driver_factory import DriverFactory
+from utilities.session_pool import SessionPool
+from utilities.network_rules import NetworkRules
+from utilities.screenshot_buffer import ScreenshotBuffer
+from utilities.screenshot_pipeline import ScreenshotPipeline
+from utilities.wait_engine import WaitEngine
+from utilities.command_tracer import CommandTracer
+from utilities.command_executor import SharedCommandExecutor
+from utilities.duration_scheduler import DurationScheduling, DurationStore
+from utilities.impact_selector import ImpactSelector, ImpactFixtureRecorder
 from utilities.video_manager import VideoManager
-from utilities.ai_debugger import AIDebugger
-from utilities.report_helper import ReportHelper
+from utilities.ai_queue import AIAnalysisQueue
+from utilities.failure_context import FailureContext
 
 logger = logging.getLogger("Conftest")
 logging.getLogger("selenium").setLevel(logging.WARNING)
@@ -36,19 +45,35 @@ def sql_client():
     yield client
     client.close()
 
+@pytest.fixture(scope="session")
+def session_pool():
+    # One pool per xdist worker (each worker is its own process)
+    pool = SessionPool(Config)
+    yield pool
+    pool.shutdown()
+
 @pytest.fixture(scope="function")
-def driver(request):
+def driver(request, session_pool):
     test_name = request.node.name
     node_id = request.node.nodeid
-    
-    # Unique ID for each test
-    execution_id = str(uuid.uuid4())
+
+    # Tests that need a video of their own never share a session
+    fresh = request.node.get_closest_marker("fresh_session") is not None
     
     driver_instance = None
     
     try:
-        driver_instance = DriverFactory.get_driver(Config, execution_id)
-        driver_instance.implicitly_wait(Config.TIMEOUT)
+        driver_instance = session_pool.acquire(fresh=fresh)
+        driver_instance.implicitly_wait(Config.IMPLICIT_WAIT)
+        ScreenshotBuffer.clear(driver_instance)
+        ScreenshotPipeline.reset()
+
+        # Per-test request rules: @pytest.mark.network_rules(block=[...], allow=[...])
+        rules_marker = request.node.get_closest_marker("network_rules")
+        if rules_marker:
+            NetworkRules.set_test_rules(driver_instance, rules_marker.kwargs.get("block", ()), rules_marker.kwargs.get("allow", ()))
+        NetworkRules.apply(driver_instance, Config)
+
         yield driver_instance
     except Exception as e:
         logger.error(f"[SETUP ERROR] Driver could not be initialized: {e}")
@@ -60,27 +85,26 @@ def driver(request):
         if getattr(node, 'rep_call', None) and node.rep_call.failed:
             is_failed = True
             try:
-                allure.attach(driver_instance.get_screenshot_as_png(), name="Error_Screenshot", attachment_type=allure.attachment_type.PNG)
+                ScreenshotPipeline.attach(driver_instance.get_screenshot_as_png(), "Error_Screenshot")
+                ScreenshotPipeline.drain()
             except Exception:
                 pass
 
+        if NetworkRules.is_enabled(Config):
+            net_stats = NetworkRules.collect_stats(driver_instance)
+            logger.info(f"🌐 Requests -> Blocked: {net_stats['blocked']} | Allowed: {net_stats['allowed']}")
+            allure.attach(json.dumps(net_stats, indent=4), name="Network Rules Stats", attachment_type=allure.attachment_type.JSON)
+
+        if CommandTracer.is_enabled(Config):
+            trace = CommandTracer.end_test(driver_instance.session_id, node_id)
+            allure.attach(json.dumps(trace, indent=4), name="WebDriver Command Trace", attachment_type=allure.attachment_type.JSON)
+
         video_name = getattr(driver_instance, 'video_name', None)
-        session_id = None
-        container_id = None
-        
-        try:
-            session_id = driver_instance.session_id
-            # Find container ID using UUID Label
-            if video_name:
-                container_id = VideoManager.get_container_id_by_uuid(execution_id)
-                if container_id:
-                    logger.info(f"✅ Container Found (UUID): {container_id[:12]}")
-                else:
-                    logger.warning(f"⚠️ Container could not be found by UUID! ExecID: {execution_id}")
-        except Exception as e:
-            logger.error(f"Teardown Error: {e}")
-
-        driver_instance.quit()
+        session_id = driver_instance.session_id
+        container_id = getattr(driver_instance, 'container_id', None)
+
+        # Reset & keep (reuse mode) or quit (fresh mode / failure / max uses reached)
+        session_pool.release(driver_instance, failed=is_failed, fresh=fresh)
 
         if video_name:
             mode = Config.RECORD_VIDEO.lower()
@@ -93,39 +117,89 @@ def driver(request):
                 should_keep = True
             
             action = "keep" if should_keep else "delete"
-            VideoManager.log_decision(node_id, test_name, session_id, container_id, video_name, action)
+            session_pool.defer(VideoManager.log_decision, node_id, test_name, session_id, container_id, video_name, action)
 
 def pytest_sessionfinish(session, exitstatus):
+    # Per-worker artifacts (every process writes its own file)
+    WaitEngine.write_report()
+    CommandTracer.write_report()
+    SharedCommandExecutor.close_all()
+    AIAnalysisQueue.wait()
+
     if hasattr(session.config, 'workerinput'):
+        if ImpactSelector.is_recording(Config):
+            # Picked up by the controller in pytest_testnodedown
+            session.config.workeroutput["impact_map"] = ImpactSelector.collect()
         return
+    DurationStore.save(session.config)
+    if ImpactSelector.is_recording(Config):
+        ImpactSelector.save(session.config)
+    AIAnalysisQueue.inject_results()
     VideoManager.post_process_cleanup()
 
+# --- DURATION-AWARE SCHEDULING (xdist) ---
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    # None -> xdist falls back to its default scheduler
+    if Config.TEST_SCHEDULER != "duration":
+        return None
+    return DurationScheduling.create(config, log)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    if ImpactSelector.is_recording(Config):
+        ImpactSelector.merge(getattr(node, "workeroutput", {}).get("impact_map"))
+
+def pytest_runtest_logreport(report):
+    # On the controller this also receives the reports of every xdist worker
+    DurationStore.add(report.nodeid, report.duration)
+
+# --- TEST IMPACT SELECTION ---
+def pytest_collection_modifyitems(config, items):
+    if not ImpactSelector.is_selecting(Config):
+        return
+    selected, deselected = ImpactSelector.select(config, items)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    if not ImpactSelector.is_recording(Config):
+        yield
+        return
+    ImpactSelector.start_context()
+    yield
+    ImpactSelector.end_test(item.nodeid, item.fixturenames)
+
+def pytest_configure(config):
+    # Reports, manifests and stats are written where allure-pytest writes its results
+    alluredir = getattr(config.option, "allure_report_dir", None)
+    if alluredir:
+        Config.ALLURE_RESULTS_DIR = os.path.abspath(alluredir)
+    if ImpactSelector.is_recording(Config):
+        config.pluginmanager.register(ImpactFixtureRecorder(), "impact-fixture-recorder")
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     outcome = yield
     rep = outcome.get_result()
     setattr(item, "rep_" + rep.when, rep)
 
+    if rep.when == "call":
+        # Buffered steps (SCREENSHOT_POLICY=last_n / on_failure) are only written for failed tests
+        driver_instance = item.funcargs.get("driver") if hasattr(item, "funcargs") else None
+        if driver_instance and rep.failed:
+            try:
+                ScreenshotBuffer.flush(driver_instance)
+            except Exception as e:
+                logger.warning(f"Screenshot Buffer Flush Error: {e}")
+        # Frames encoded off-thread during the test are attached now, in capture order
+        ScreenshotPipeline.drain()
+
     # --- DEBUGGER INTEGRATION ---
+    # Queued: the LLM round trip runs in the background, the report is attached at session end.
+    # The prompt is a structured extract (exception chain, step, locator, DOM) within AI_CONTEXT_TOKENS.
     if rep.when == "call" and rep.failed:
-        long_repr = str(rep.longrepr)
-        error_extract = long_repr[-1500:] if len(long_repr) > 1500 else long_repr
-        
-        # 1. Get Analysis (Logic Layer)
-        ai_analysis_md = AIDebugger.analyze_error(error_extract)
-        
-        if ai_analysis_md is None:
-            return 
-
-        # 2. Convert to HTML
-        styled_html = ReportHelper.convert_to_html(
-            ai_analysis_md, 
-            model_name=AIDebugger.CURRENT_MODEL_NAME
-        )
-        
-        # 3. Report
-        allure.attach(
-            styled_html, 
-            name="🤖 AI Analysis Report", 
-            attachment_type=allure.attachment_type.HTML
-        )
\ No newline at end of file
+        error_extract = FailureContext.build(call, rep, driver_instance)
+        AIAnalysisQueue.submit(item.nodeid, error_extract)
@@ -1,6 +1,12 @@
 # utilities/ai_debugger.py
 
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed, wait
+from config import Config
+from utilities.analysis_cache import AnalysisCache
+from utilities.failure_classifier import FailureClassifier
+from utilities.llm_clients import AIBudgetExceeded, LLMClients
 
 # Make dependencies optional
 try:
@@ -19,13 +25,17 @@ class AIDebugger:
     DEFAULT_GEMINI_MODEL = "gemini-3-flash-preview"
     DEFAULT_OPENAI_MODEL = "gpt-4o"
     
+    PROVIDERS = ("gemini", "openai")
+
     # Dynamic variable for Report Title
     CURRENT_MODEL_NAME = "AI Analysis"
 
     @staticmethod
     def analyze_error(error_message):
         """
-        Analyzes based on AI_PROVIDER value (gemini, openai, all, off).
+        Analyzes based on AI_PROVIDER value (gemini, openai, all, first, off).
+        Known failure categories are answered by FailureClassifier without a model call.
+        Every provider call is bounded by AI_TIMEOUT seconds.
         """
         provider = os.getenv("AI_PROVIDER", AIDebugger.DEFAULT_PROVIDER).lower()
 
@@ -33,40 +43,135 @@ class AIDebugger:
         if provider in ["off", "none", "false", "0"]:
             return None  # Do nothing, return None.
 
+        # --- OFFLINE FAST PATH (known failure categories) ---
+        if Config.AI_RULES:
+            known_analysis = FailureClassifier.classify(error_message)
+            if known_analysis:
+                AIDebugger.CURRENT_MODEL_NAME = FailureClassifier.MODEL_NAME
+                return known_analysis
+
+        # --- FAILURE SIGNATURE CACHE ---
+        if not AnalysisCache.is_enabled():
+            return AIDebugger._analyze(provider, error_message)
+
+        cache_key = AnalysisCache.key(provider, AIDebugger._model_id(provider), error_message)
+        cached = AnalysisCache.get(cache_key)
+        if cached:
+            AIDebugger.CURRENT_MODEL_NAME = cached["model_name"]
+            return f"> ♻️ Cached analysis (same failure signature)\n\n{cached['analysis']}"
+
+        analysis = AIDebugger._analyze(provider, error_message)
+        # Error/warning placeholders (missing key, API error...) are not worth caching
+        if analysis and not AIDebugger.is_placeholder(analysis):
+            AnalysisCache.put(cache_key, analysis, AIDebugger.CURRENT_MODEL_NAME)
+        return analysis
+
+    @staticmethod
+    def is_placeholder(analysis) -> bool:
+        """True if no provider answered (only ❌/⚠️ error, budget or timeout notes; 'all' mode: both sections)."""
+        if not analysis:
+            return True
+        for section in re.split(r"^---$", analysis, flags=re.M):
+            lines = [line.strip() for line in section.splitlines() if line.strip() and not line.startswith("###")]
+            if lines and not lines[0].startswith(("❌", "⚠️")):
+                return False
+        return True
+
+    @staticmethod
+    def _model_id(provider):
+        gemini_model = os.getenv("GEMINI_MODEL", AIDebugger.DEFAULT_GEMINI_MODEL)
+        openai_model = os.getenv("OPENAI_MODEL", AIDebugger.DEFAULT_OPENAI_MODEL)
+        return {"gemini": gemini_model, "openai": openai_model}.get(provider, f"{gemini_model}+{openai_model}")
+
+    @staticmethod
+    def _analyze(provider, error_message):
         # COMMON PROMPTS
         system_prompt = (
             "You are a Senior QA Automation Engineer. "
-            "Analyze the given error log, find the root cause, and suggest a solution."
+            "Analyze the given failure context (exception chain, failing step, locator, stack, DOM excerpt), "
+            "find the root cause, and suggest a solution."
         )
         user_prompt = (
             f"Please answer in markdown format using these headings:\n"
             f"**1. Error Summary**\n**2. Root Cause**\n**3. Solution**\n\n"
-            f"--- LOG ---\n{error_message}"
+            f"--- FAILURE CONTEXT ---\n{error_message}"
         )
 
         # --- SCENARIO 2: USE BOTH (ALL) ---
+        # Queried concurrently: the failure costs the slower provider (capped by AI_TIMEOUT), not the sum.
         if provider == "all":
             AIDebugger.CURRENT_MODEL_NAME = "Gemini vs ChatGPT"
-            gemini_res = AIDebugger._analyze_with_gemini(user_prompt)
-            openai_res = AIDebugger._analyze_with_openai(system_prompt, user_prompt)
+            results = AIDebugger._query_all(system_prompt, user_prompt)
             
             # Combine two answers one after another
             return (
-                f"### 🔵 Google Gemini Analysis\n{gemini_res}\n\n"
+                f"### 🔵 Google Gemini Analysis\n{results['gemini']}\n\n"
                 f"---\n\n"
-                f"### 🟢 ChatGPT Analysis\n{openai_res}"
+                f"### 🟢 ChatGPT Analysis\n{results['openai']}"
             )
 
-        # --- SCENARIO 3: SINGLE SELECTION ---
-        elif provider == "openai":
-            return AIDebugger._analyze_with_openai(system_prompt, user_prompt)
-        
-        elif provider == "gemini":
-            return AIDebugger._analyze_with_gemini(user_prompt)
+        # --- SCENARIO 3: FASTEST PROVIDER (FIRST) ---
+        elif provider == "first":
+            winner, analysis = AIDebugger._query_first(system_prompt, user_prompt)
+            AIDebugger.CURRENT_MODEL_NAME = AIDebugger._model_name(winner) if winner else "Gemini / ChatGPT"
+            return analysis
+
+        # --- SCENARIO 4: SINGLE SELECTION ---
+        elif provider in AIDebugger.PROVIDERS:
+            AIDebugger.CURRENT_MODEL_NAME = AIDebugger._model_name(provider)
+            return AIDebugger._query_all(system_prompt, user_prompt, [provider])[provider]
             
         else:
             return f"⚠️ Unknown AI Provider: {provider}"
 
+    @staticmethod
+    def _query_all(system_prompt, user_prompt, providers=PROVIDERS):
+        """Asks the providers in parallel. A provider that misses the deadline gets a placeholder."""
+        # Per-call executor: a request abandoned at the deadline never blocks the next analysis
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="ai-provider")
+        futures = {name: executor.submit(AIDebugger._call, name, system_prompt, user_prompt) for name in providers}
+        done, _ = wait(futures.values(), timeout=Config.AI_TIMEOUT)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for name, future in futures.items():
+            if future in done:
+                results[name] = future.result()
+            else:
+                results[name] = f"⚠️ No answer within {Config.AI_TIMEOUT:g}s."
+        return results
+
+    @staticmethod
+    def _query_first(system_prompt, user_prompt):
+        """Returns (provider, analysis) of the first useful answer and cancels the other request."""
+        executor = ThreadPoolExecutor(max_workers=len(AIDebugger.PROVIDERS), thread_name_prefix="ai-provider")
+        futures = {executor.submit(AIDebugger._call, name, system_prompt, user_prompt): name for name in AIDebugger.PROVIDERS}
+        errors = []
+        try:
+            for future in as_completed(futures, timeout=Config.AI_TIMEOUT):
+                analysis = future.result()
+                if analysis and not analysis.startswith(("❌", "⚠️")):
+                    return futures[future], analysis
+                errors.append(analysis)
+        except FuturesTimeout:
+            errors.append(f"⚠️ No answer within {Config.AI_TIMEOUT:g}s.")
+        finally:
+            # Queued requests are dropped; a request already on the wire is bounded by the client timeout.
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None, "\n\n".join(errors)
+
+    @staticmethod
+    def _call(provider, system_prompt, user_prompt):
+        if provider == "gemini":
+            return AIDebugger._analyze_with_gemini(user_prompt)
+        return AIDebugger._analyze_with_openai(system_prompt, user_prompt)
+
+    @staticmethod
+    def _model_name(provider):
+        if provider == "gemini":
+            return f"Google {os.getenv('GEMINI_MODEL', AIDebugger.DEFAULT_GEMINI_MODEL)}"
+        return f"OpenAI {os.getenv('OPENAI_MODEL', AIDebugger.DEFAULT_OPENAI_MODEL)}"
+
     @staticmethod
     def _analyze_with_gemini(prompt):
         if not genai:
@@ -77,12 +182,12 @@ class AIDebugger:
 
         try:
             model = os.getenv("GEMINI_MODEL", AIDebugger.DEFAULT_GEMINI_MODEL)
-            if AIDebugger.CURRENT_MODEL_NAME != "Gemini vs ChatGPT":
-                AIDebugger.CURRENT_MODEL_NAME = f"Google {model}"
-            
-            client = genai.Client(api_key=api_key)
-            response = client.models.generate_content(model=model, contents=prompt)
+            response = LLMClients.call(
+                "gemini", lambda client: client.models.generate_content(model=model, contents=prompt)
+            )
             return response.text
+        except AIBudgetExceeded as e:
+            return f"⚠️ {e}"
         except Exception as e:
             return f"❌ Gemini Error: {str(e)}"
 
@@ -96,17 +201,15 @@ class AIDebugger:
 
         try:
             model = os.getenv("OPENAI_MODEL", AIDebugger.DEFAULT_OPENAI_MODEL)
-            if AIDebugger.CURRENT_MODEL_NAME != "Gemini vs ChatGPT":
-                AIDebugger.CURRENT_MODEL_NAME = f"OpenAI {model}"
-            
-            client = openai.OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
+            response = LLMClients.call("openai", lambda client: client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ]
-            )
+            ))
             return response.choices[0].message.content
+        except AIBudgetExceeded as e:
+            return f"⚠️ {e}"
         except Exception as e:
             return f"❌ OpenAI Error: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import time
+import fcntl
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import Config
+from utilities.ai_debugger import AIDebugger
+from utilities.failure_context import FailureContext
+from utilities.failure_clusters import FailureClusters
+from utilities.llm_clients import LLMClients
+from utilities.report_helper import ReportHelper
+from utilities.triage_dashboard import TriageDashboard
+from utilities.video_manager import VideoManager
+
+class AIAnalysisQueue:
+    """
+    [ARCHITECTURE: Non-Blocking, Clustered AI Failure Analysis]
+    1. The makereport hook only submits the error extract; the xdist worker moves on to the next test.
+    2. Failures are grouped by root cause (FailureClusters). Every failure is logged to the manifest
+       as a cluster member; only the first one of a cluster (run-wide) is analyzed. If that analysis
+       fails (error, AI budget, AI_QUEUE_TIMEOUT), the next member of the cluster takes it over.
+    3. A single background thread (AIDebugger keeps the model name in class state) runs the LLM
+       round trip, writes the HTML report as an Allure attachment file and logs it to the manifest.
+    4. Failures and analyses are also streamed to the triage page (TriageDashboard) as they happen.
+    5. Each worker waits for its queue at session end (AI_QUEUE_TIMEOUT). The controller then
+       patches the cluster's report and a cluster summary into every member's result JSON,
+       like videos (VideoManager.inject_attachments).
+    """
+
+    MANIFEST_NAME = "ai_manifest.jsonl"
+    ATTACHMENT_NAME = "🤖 AI Analysis Report"
+    CLUSTER_ATTACHMENT_NAME = "🧩 Failure Cluster"
+
+    logger = logging.getLogger("AIAnalysisQueue")
+    _executor = None
+    _futures = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def submit(node_id, error_extract):
+        failure = FailureClusters.describe(error_extract)
+        AIAnalysisQueue._log({"type": "member", "node_id": node_id, **failure})
+        TriageDashboard.add_failure(node_id, failure, FailureContext.page_object(error_extract), error_extract)
+
+        if not FailureClusters.claim(failure["cluster"]):
+            AIAnalysisQueue.logger.info(f"🧩 Joins failure cluster {failure['cluster']} (no new analysis) <- {node_id}")
+            return
+
+        future = AIAnalysisQueue._get_executor().submit(AIAnalysisQueue._analyze, failure["cluster"], error_extract)
+        with AIAnalysisQueue._lock:
+            AIAnalysisQueue._futures[future] = failure["cluster"]
+        AIAnalysisQueue.logger.info(f"🤖 AI analysis queued for cluster {failure['cluster']} <- {node_id}")
+
+    @staticmethod
+    def wait(timeout=None):
+        """Blocks until queued analyses are written (end of the worker session)."""
+        with AIAnalysisQueue._lock:
+            futures, AIAnalysisQueue._futures = AIAnalysisQueue._futures, {}
+            executor, AIAnalysisQueue._executor = AIAnalysisQueue._executor, None
+        if executor is None:
+            return
+
+        timeout = timeout if timeout is not None else Config.AI_QUEUE_TIMEOUT
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            AIAnalysisQueue.logger.warning(f"⏳ {len(not_done)} AI analysis(es) not finished within {timeout}s, skipped.")
+            # Members still arriving on other workers may take these clusters over
+            for future in not_done:
+                FailureClusters.finish(futures[future], succeeded=False)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        usage = LLMClients.usage()
+        AIAnalysisQueue.logger.info(f"🤖 AI usage (run): {usage['calls']} calls | {usage['tokens']} tokens | {usage['refused']} refused")
+
+    @staticmethod
+    def inject_results():
+        """Attaches analyses + cluster summaries to every member's Allure result (controller, after all workers)."""
+        if not os.path.exists(AIAnalysisQueue._manifest_path()):
+            return
+
+        clusters = {}
+        try:
+            with open(AIAnalysisQueue._manifest_path(), "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    cluster = clusters.setdefault(entry["cluster"], {"members": [], "locator": "", "signature": "", "source": None, "placeholder": True})
+                    if entry["type"] == "member":
+                        cluster["members"].append(entry["node_id"])
+                        cluster["locator"], cluster["signature"] = entry["locator"], entry["signature"]
+                    elif not entry.get("placeholder") or cluster["placeholder"]:
+                        # A taken-over analysis wins over the failed attempt's placeholder, whatever the order
+                        cluster["source"], cluster["placeholder"] = entry["source"], entry.get("placeholder", False)
+            os.remove(AIAnalysisQueue._manifest_path())
+        except Exception as e:
+            AIAnalysisQueue.logger.error(f"AI Manifest Error: {e}")
+            return
+
+        # All cluster summaries are rendered in one batch
+        summary_pages = iter(ReportHelper.convert_many([
+            (FailureClusters.summary_markdown(cluster_id, cluster["members"], cluster["locator"], cluster["signature"]),
+             f"Failure Cluster {cluster_id}")
+            for cluster_id, cluster in clusters.items() if cluster["members"]
+        ], title="Failure Cluster Summary", icon="🧩"))
+
+        patches = []
+        for cluster_id, cluster in clusters.items():
+            attachments = []
+            if cluster["source"]:
+                attachments.append({"name": AIAnalysisQueue.ATTACHMENT_NAME, "source": cluster["source"], "type": "text/html"})
+            if cluster["members"]:
+                attachments.append({
+                    "name": f"{AIAnalysisQueue.CLUSTER_ATTACHMENT_NAME} ({len(cluster['members'])} tests)",
+                    "source": AIAnalysisQueue._write_attachment(next(summary_pages)),
+                    "type": "text/html",
+                })
+
+            patches.extend((node_id, attachment, False) for node_id in cluster["members"] for attachment in attachments)
+
+        # One indexed, batched pass over the Allure results
+        missing = VideoManager.inject_attachments(patches)
+        for node_id in sorted(missing):
+            AIAnalysisQueue.logger.warning(f"No Allure result found for AI analysis <- {node_id}")
+        injected = len({node_id for node_id, _, _ in patches} - missing)
+        AIAnalysisQueue.logger.info(f"🤖 AI analyses added to report: {injected} test(s) in {len(clusters)} cluster(s)")
+
+    @staticmethod
+    def _analyze(cluster, error_extract):
+        succeeded = False
+        try:
+            usage_before, started = LLMClients.process_usage(), time.monotonic()
+            ai_analysis_md = AIDebugger.analyze_error(error_extract)
+            if ai_analysis_md is None:
+                succeeded = True  # AI_PROVIDER=off: nothing to take over
+                return
+            # A placeholder (API error, budget, timeout) is still attached, but the next member may retry
+            succeeded = not AIDebugger.is_placeholder(ai_analysis_md)
+
+            styled_html = ReportHelper.convert_to_html(ai_analysis_md, model_name=AIDebugger.CURRENT_MODEL_NAME)
+            source = AIAnalysisQueue._write_attachment(styled_html)
+            AIAnalysisQueue._log({"type": "analysis", "cluster": cluster, "source": source, "placeholder": not succeeded})
+            TriageDashboard.add_analysis(
+                cluster, source, AIDebugger.CURRENT_MODEL_NAME,
+                AIAnalysisQueue._usage_delta(usage_before, LLMClients.process_usage()), time.monotonic() - started,
+            )
+            AIAnalysisQueue.logger.info(f"🤖 AI analysis ready for cluster {cluster}")
+        except Exception as e:
+            succeeded = False
+            AIAnalysisQueue.logger.error(f"AI Analysis Error (cluster {cluster}): {e}")
+        finally:
+            FailureClusters.finish(cluster, succeeded)
+
+    @staticmethod
+    def _usage_delta(before, after) -> dict:
+        # Only this thread analyzes in this process, so the difference belongs to this analysis
+        delta = {}
+        for provider, usage in after.items():
+            previous = before.get(provider, {"calls": 0, "tokens": 0, "seconds": 0.0})
+            if usage["calls"] > previous["calls"]:
+                delta[provider] = {key: usage[key] - previous[key] for key in ("calls", "tokens", "seconds")}
+        return delta
+
+    @staticmethod
+    def _manifest_path() -> str:
+        # Resolved per call: conftest points Config.ALLURE_RESULTS_DIR at pytest's --alluredir
+        return os.path.join(Config.ALLURE_RESULTS_DIR, AIAnalysisQueue.MANIFEST_NAME)
+
+    @staticmethod
+    def _write_attachment(html) -> str:
+        # Content-addressed: identical reports (e.g. cached analyses) share one file
+        source = f"{hashlib.sha1(html.encode('utf-8')).hexdigest()}-attachment.html"
+        path = os.path.join(Config.ALLURE_RESULTS_DIR, source)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        return source
+
+    @staticmethod
+    def _log(entry):
+        try:
+            with open(AIAnalysisQueue._manifest_path(), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(json.dumps(entry) + "\n")
+                fcntl.flock(f, fcntl.LOCK_UN)
+        except Exception as e:
+            AIAnalysisQueue.logger.error(f"AI Manifest Error: {e}")
+
+    @staticmethod
+    def _get_executor():
+        with AIAnalysisQueue._lock:
+            if AIAnalysisQueue._executor is None:
+                AIAnalysisQueue._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-analysis")
+            return AIAnalysisQueue._executor
@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from config import Config
+
+class AnalysisCache:
+    """
+    [ARCHITECTURE: Failure Signature Cache (AI_CACHE)]
+    1. Signature: only the error lines (pytest / FailureContext 'E ' lines, i.e. the exception chain)
+       with run-specific noise removed (memory addresses, UUIDs, session/element IDs, timestamps,
+       ports, durations), plus the failing locator. Test names, file paths, line numbers, echoed
+       source, steps and DOM excerpts are not part of it, so the same broken locator produces
+       the same key in every test and every run (same rule as FailureClusters).
+    2. Key = sha256(provider | model | signature | locator). One JSON file per key in AI_CACHE_DIR
+       (default .pytest_cache/ai_analysis, which CI and docker-compose already persist).
+    3. Writes are atomic (temp file + os.replace), so xdist workers share the directory safely.
+       File mtime is the last access time: hits refresh it, expired entries (AI_CACHE_TTL_HOURS)
+       are dropped and the least recently used ones are evicted above AI_CACHE_MAX_ENTRIES.
+    """
+
+    NOISE_PATTERNS = (
+        (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+        (re.compile(r"0x[0-9a-f]+", re.I), "0x<addr>"),
+        (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<timestamp>"),
+        (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<time>"),
+        (re.compile(r"\b[0-9a-f]{16,}\b", re.I), "<id>"),
+        (re.compile(r"\b(session|element)(=|: ?)(['\"]?)[\w.-]+\3", re.I), r"\1\2<id>"),
+        (re.compile(r"\b(localhost|127\.0\.0\.1|[\w-]+\.local)(:)\d+\b"), r"\1\2<port>"),
+        (re.compile(r"\b\d+\.\d+\s?(ms|s)\b"), r"<duration>"),
+        (re.compile(r"\s+"), " "),
+    )
+
+    LOCATOR_PATTERN = re.compile(
+        r"\(['\"](id|xpath|css selector|class name|name|tag name|link text|partial link text)['\"],\s*(['\"])(.+?)\2\)"
+    )
+
+    logger = logging.getLogger("AnalysisCache")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return Config.AI_CACHE
+
+    @staticmethod
+    def signature(error_text) -> str:
+        signature = error_text or ""
+        for pattern, replacement in AnalysisCache.NOISE_PATTERNS:
+            signature = pattern.sub(replacement, signature)
+        return signature.strip()
+
+    @staticmethod
+    def failure_signature(error_text):
+        """(signature of the 'E ' lines, 'strategy=value' locator or '') of a failure."""
+        error_lines = [line for line in (error_text or "").splitlines() if line.startswith("E ")]
+        signature = AnalysisCache.signature("\n".join(error_lines) if error_lines else error_text)
+        match = AnalysisCache.LOCATOR_PATTERN.search(error_text or "")
+        locator = f"{match.group(1)}={match.group(3)}" if match else ""
+        return signature, locator
+
+    @staticmethod
+    def key(provider, model, error_text) -> str:
+        signature, locator = AnalysisCache.failure_signature(error_text)
+        raw = f"{provider}|{model}|{signature}|{locator}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get(key):
+        """Returns the cached entry ({'analysis', 'model_name', ...}) or None (miss / expired)."""
+        path = AnalysisCache._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > Config.AI_CACHE_TTL_HOURS * 3600:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # LRU: mtime = last access
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def put(key, analysis, model_name):
+        directory = AnalysisCache._directory()
+        entry = {"analysis": analysis, "model_name": model_name, "created": time.time()}
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(f.name, AnalysisCache._path(key))
+            AnalysisCache._evict(directory)
+        except OSError as e:
+            AnalysisCache.logger.warning(f"AI Cache Write Error: {e}")
+
+    @staticmethod
+    def _evict(directory):
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(directory, name)), name))
+                except OSError:
+                    continue  # Evicted by another worker
+
+        expired_before = time.time() - Config.AI_CACHE_TTL_HOURS * 3600
+        entries.sort()
+        overflow = max(0, len(entries) - Config.AI_CACHE_MAX_ENTRIES)
+        for index, (mtime, name) in enumerate(entries):
+            if index >= overflow and mtime >= expired_before:
+                break
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _directory() -> str:
+        os.makedirs(Config.AI_CACHE_DIR, exist_ok=True)
+        return Config.AI_CACHE_DIR
+
+    @staticmethod
+    def _path(key) -> str:
+        return os.path.join(AnalysisCache._directory(), f"{key}.json")
@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import time
+import fcntl
+import logging
+import subprocess
+import urllib.request
+from config import Config
+from utilities.shared_state import SharedState
+
+class CapacityPlanner:
+    """
+    [ARCHITECTURE: Capacity-Aware Sizing (CAPACITY_MODE=auto)]
+    Runs on the host (start_tests.py) before the stack starts. Standard library only.
+    1. CPU budget    : One browser container per core, one core reserved for Selenoid + pytest.
+    2. Memory budget : (Available memory - HOST_RESERVE_MB) / memory per browser session.
+                       Per-session memory = 'mem' of the browser in config/browsers_*.json
+                       (or BROWSER_MEMORY_MB / built-in estimate) + video recorder when recording.
+    3. Live Selenoid : If SELENOID_STATUS_URL points to a running Selenoid, its free slots cap the result.
+    Every budget is divided by the sessions per worker (2 with SESSION_PREFETCH: the spare is a live browser too).
+    xdist workers = min(budgets). Selenoid '-limit' = workers x sessions per worker.
+    """
+
+    # Estimated peak RSS of one browser container in MB (used when browsers_*.json has no 'mem')
+    BROWSER_MEMORY_MB = {"chrome": 1024, "firefox": 1280}
+    VIDEO_RECORDER_MB = 256
+
+    logger = logging.getLogger("CapacityPlanner")
+
+    @staticmethod
+    def plan(browsers_json_path, browser=None) -> dict:
+        browser = (browser or Config.BROWSER).lower()
+        cpus, memory_mb = CapacityPlanner.host_resources()
+        session_mb = CapacityPlanner.session_memory_mb(browsers_json_path, browser)
+
+        # Budgets are in workers: with SESSION_PREFETCH each one keeps two live browsers
+        sessions_per_worker = 2 if Config.SESSION_PREFETCH else 1
+        cpu_budget = max(1, (cpus - 1) // sessions_per_worker)
+        if memory_mb:
+            memory_budget = max(1, (memory_mb - Config.HOST_RESERVE_MB) // (session_mb * sessions_per_worker))
+        else:
+            memory_budget = cpu_budget
+        workers = min(cpu_budget, memory_budget)
+
+        selenoid_free = CapacityPlanner.selenoid_free_slots(Config.SELENOID_STATUS_URL)
+        if selenoid_free is not None:
+            workers = min(workers, max(1, selenoid_free // sessions_per_worker))
+
+        return {
+            "workers": workers,
+            "selenoid_limit": workers * sessions_per_worker,
+            "cpus": cpus,
+            "memory_mb": memory_mb,
+            "session_mb": session_mb,
+            "cpu_budget": cpu_budget,
+            "memory_budget": memory_budget,
+            "selenoid_free": selenoid_free,
+        }
+
+    @staticmethod
+    def host_resources() -> tuple:
+        """
+        (CPUs, available memory in MB) usable by containers.
+        Docker Desktop runs containers in a VM: 'docker info' reports that VM, not the host.
+        """
+        cpus = os.cpu_count() or 1
+        memory_mb = CapacityPlanner._meminfo_available_mb()
+        try:
+            result = subprocess.run(
+                ["docker", "info", "--format", "{{.NCPU}} {{.MemTotal}}"],
+                capture_output=True, text=True, check=True, timeout=15,
+            )
+            docker_cpus, docker_memory = result.stdout.split()
+            cpus = min(cpus, int(docker_cpus))
+            docker_memory_mb = int(docker_memory) // (1024 * 1024)
+            memory_mb = min(memory_mb, docker_memory_mb) if memory_mb else docker_memory_mb
+        except (OSError, ValueError, subprocess.SubprocessError):
+            pass
+        return cpus, memory_mb
+
+    @staticmethod
+    def session_memory_mb(browsers_json_path, browser) -> int:
+        memory_mb = Config.BROWSER_MEMORY_MB or CapacityPlanner._configured_memory_mb(browsers_json_path, browser)
+        memory_mb = memory_mb or CapacityPlanner.BROWSER_MEMORY_MB.get(browser, 1024)
+        if Config.RECORD_VIDEO != "false":
+            memory_mb += CapacityPlanner.VIDEO_RECORDER_MB
+        return memory_mb
+
+    @staticmethod
+    def selenoid_free_slots(status_url):
+        """Free session slots of a running Selenoid ('total - used - pending - queued'), None if unreachable."""
+        if not status_url or not status_url.startswith(("http://", "https://")):
+            return None
+        try:
+            with urllib.request.urlopen(status_url, timeout=5) as response:  # nosec B310 (scheme checked above)
+                status = json.load(response)
+            return status["total"] - status.get("used", 0) - status.get("pending", 0) - status.get("queued", 0)
+        except Exception as e:
+            CapacityPlanner.logger.warning(f"Selenoid Status Error: {e}")
+            return None
+
+    @staticmethod
+    def _configured_memory_mb(browsers_json_path, browser) -> int:
+        """'mem' of the default version in browsers_*.json (Docker notation: 512m, 1.5g)."""
+        try:
+            with open(browsers_json_path) as f:
+                entry = json.load(f)[browser]
+            mem = entry["versions"][entry["default"]].get("mem", "")
+        except (OSError, KeyError, ValueError):
+            return 0
+
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)([kmg]?)b?", str(mem).strip().lower())
+        if not match:
+            return 0
+        factor = {"k": 1 / 1024, "m": 1, "g": 1024, "": 1 / (1024 * 1024)}[match.group(2)]
+        return int(float(match.group(1)) * factor)
+
+    @staticmethod
+    def _meminfo_available_mb() -> int:
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError):
+            pass
+        return 0
+
+class CapacityTimeout(Exception):
+    """No concurrency slot became free within CAPACITY_WAIT_TIMEOUT."""
+
+class ConcurrencyController:
+    """
+    [ARCHITECTURE: Latency-Driven Concurrency Gate (CAPACITY_CONTROL)]
+    Shared by all xdist workers of a run through flock'ed files in a temp directory.
+    1. Every live browser session holds one of 'limit' slots, from creation until quit
+       (prefetched spares and idle reusable sessions included).
+    2. Every session creation reports its latency. Above SESSION_LATENCY_TARGET the limit shrinks
+       (x0.75, min 1); well below it (< 50%) the limit grows back by 1, up to the worker count
+       (x2 with SESSION_PREFETCH).
+    Workers above the limit wait instead of starting more browsers on a thrashing host;
+    after CAPACITY_WAIT_TIMEOUT the session creation fails (CapacityTimeout) instead of adding load.
+    """
+
+    DECREASE_FACTOR = 0.75
+    POLL_SECONDS = 0.5
+
+    logger = logging.getLogger("ConcurrencyController")
+
+    @staticmethod
+    def is_enabled(config) -> bool:
+        return bool(getattr(config, "CAPACITY_CONTROL", False))
+
+    @staticmethod
+    def acquire_slot():
+        """Blocks until a slot below the current limit is free. Returns the open slot file, raises CapacityTimeout."""
+        deadline = time.monotonic() + Config.CAPACITY_WAIT_TIMEOUT
+        waited = False
+        while True:
+            limit = ConcurrencyController._state()["limit"]
+            for index in range(limit):
+                handle = open(os.path.join(ConcurrencyController._directory(), f"slot_{index}.lock"), "w")
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if waited:
+                        ConcurrencyController.logger.info(f"🚦 Slot {index} acquired (limit {limit}).")
+                    return handle
+                except OSError:
+                    handle.close()
+
+            if time.monotonic() >= deadline:
+                raise CapacityTimeout(
+                    f"🚦 No concurrency slot free within {Config.CAPACITY_WAIT_TIMEOUT}s (limit {limit}), session not created."
+                )
+            if not waited:
+                ConcurrencyController.logger.info(f"🚦 Concurrency limit {limit} reached, waiting for a slot...")
+                waited = True
+            time.sleep(ConcurrencyController.POLL_SECONDS)
+
+    @staticmethod
+    def release_slot(handle):
+        if handle is None:
+            return
+        try:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    @staticmethod
+    def report_latency(seconds):
+        """Adjusts the shared limit after a session creation (AIMD)."""
+        target = Config.SESSION_LATENCY_TARGET
+        with ConcurrencyController._locked_state() as state:
+            limit = state["limit"]
+            if seconds > target:
+                state["limit"] = max(1, int(limit * ConcurrencyController.DECREASE_FACTOR))
+            elif seconds < target / 2:
+                state["limit"] = min(state["max"], limit + 1)
+
+            if state["limit"] != limit:
+                ConcurrencyController.logger.info(
+                    f"🚦 Session creation {seconds:.1f}s (target {target}s): concurrency {limit} -> {state['limit']}"
+                )
+
+    @staticmethod
+    def _directory() -> str:
+        return SharedState.run_directory("capacity")
+
+    @staticmethod
+    def _state() -> dict:
+        with ConcurrencyController._locked_state() as state:
+            return dict(state)
+
+    @staticmethod
+    def _locked_state():
+        # The first worker initializes the limit with the session count (worker count, x2 with a prefetched spare)
+        sessions = int(os.getenv("PYTEST_XDIST_WORKER_COUNT", 1)) * (2 if Config.SESSION_PREFETCH else 1)
+        return SharedState.locked(
+            os.path.join(ConcurrencyController._directory(), "state.json"),
+            lambda: {"limit": sessions, "max": sessions},
+        )
@@ -0,0 +1,115 @@
+import logging
+import threading
+import urllib3
+from urllib3.exceptions import ProtocolError
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.firefox.remote_connection import FirefoxRemoteConnection
+from selenium.webdriver.remote.client_config import ClientConfig
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from appium.webdriver.appium_connection import AppiumConnection
+from config import Config
+from utilities.command_tracer import CommandTracer
+
+class _ResetRetry(urllib3.Retry):
+    """
+    Connect failures (request never sent) are retried on every verb.
+    A reset/disconnect after sending (ProtocolError) may come after Selenoid already ran the command,
+    so it is retried only for idempotent verbs: a repeated POST could open an orphan session
+    (newSession) or repeat an action (click, sendKeys).
+    Read timeouts are never retried: the command may still be running on the browser.
+    """
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+
+    def _is_read_error(self, err):
+        return isinstance(err, ProtocolError)
+
+class _PooledConnectionMixin:
+    """
+    Tunes Selenium's keep-alive pool (size, retries) and shares it by all sessions.
+    Proxy, ca_certs and ignore_certificates come from the ClientConfig as usual: only the pool
+    keyword arguments are extended. The timeout lives in the ClientConfig, because Selenium
+    passes it on every request (overriding any pool-level timeout).
+    """
+
+    def _get_connection_manager(self):
+        manager = super()._get_connection_manager()
+        retries = _ResetRetry(
+            total=Config.HTTP_RETRIES,
+            connect=Config.HTTP_RETRIES,
+            read=Config.HTTP_RETRIES,
+            status=0,
+            other=0,
+            # Limits read (reset) retries only; connect retries apply to every verb
+            allowed_methods=_ResetRetry.IDEMPOTENT_METHODS,
+            backoff_factor=Config.HTTP_RETRY_BACKOFF,
+            raise_on_status=False,
+        )
+        # Applied to every connection pool the manager creates (none exist yet)
+        manager.connection_pool_kw.update(maxsize=Config.HTTP_POOL_SIZE, retries=retries)
+        return manager
+
+    def close(self):
+        # WebDriver.quit() closes its executor; the shared one must outlive single sessions.
+        pass
+
+    def close_pool(self):
+        super().close()
+
+class SharedCommandExecutor:
+    """
+    [ARCHITECTURE: One Keep-Alive Command Executor per Worker]
+    webdriver.Remote(command_executor=<url>) builds a new RemoteConnection + urllib3 pool per session.
+    Here every session of an xdist worker (web and Appium) talks to Selenoid through one cached
+    connection per (browser kind, URL): sockets stay open across sessions and tests.
+    """
+
+    CONNECTION_CLASSES = {
+        "chrome": ChromeRemoteConnection,   # Keeps vendor commands (e.g. CDP execute)
+        "firefox": FirefoxRemoteConnection,
+        "appium": AppiumConnection,
+        "generic": RemoteConnection,
+    }
+
+    logger = logging.getLogger("SharedCommandExecutor")
+    _executors = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(remote_url: str, kind: str = "generic"):
+        kind = kind if kind in SharedCommandExecutor.CONNECTION_CLASSES else "generic"
+        key = (kind, remote_url)
+
+        with SharedCommandExecutor._lock:
+            executor = SharedCommandExecutor._executors.get(key)
+            if executor is None:
+                base = SharedCommandExecutor.CONNECTION_CLASSES[kind]
+                pooled_class = type(f"Pooled{base.__name__}", (_PooledConnectionMixin, base), {})
+                client_config = ClientConfig(
+                    remote_server_addr=remote_url,
+                    keep_alive=True,
+                    # Per-request timeout: a hung Selenoid fails the command instead of blocking the worker
+                    timeout=urllib3.Timeout(connect=Config.HTTP_CONNECT_TIMEOUT, read=Config.HTTP_READ_TIMEOUT),
+                )
+                if kind in ("chrome", "firefox"):
+                    # Vendor connections still require the address argument (ignored when client_config is set)
+                    executor = pooled_class(remote_url, client_config=client_config)
+                else:
+                    executor = pooled_class(client_config=client_config)
+                if CommandTracer.is_enabled(Config):
+                    CommandTracer.instrument(executor)
+                SharedCommandExecutor._executors[key] = executor
+                SharedCommandExecutor.logger.info(
+                    f"🔌 Shared {kind} executor created: {remote_url} (Pool: {Config.HTTP_POOL_SIZE}, Retries: {Config.HTTP_RETRIES})"
+                )
+            return executor
+
+    @staticmethod
+    def close_all():
+        """Closes pooled sockets (end of the worker session)."""
+        with SharedCommandExecutor._lock:
+            executors, SharedCommandExecutor._executors = SharedCommandExecutor._executors, {}
+        for executor in executors.values():
+            try:
+                executor.close_pool()
+            except Exception as e:
+                SharedCommandExecutor.logger.warning(f"Executor Close Error: {e}")
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from config import Config
+
+class CommandTracer:
+    """
+    [ARCHITECTURE: Opt-In WebDriver Command Tracing (TRACE_COMMANDS)]
+    1. Wraps the command executor's 'execute': every remote command (name, duration,
+       request/response payload size) is recorded under its session ID.
+    2. At test end the session's records become a per-test summary:
+       totals, slowest commands and a per-command histogram (attached to Allure).
+    3. At session end each xdist worker writes its summaries to command_trace_<worker>.json.
+    """
+
+    SLOWEST_COUNT = 5
+
+    logger = logging.getLogger("CommandTracer")
+    _records = defaultdict(list)
+    _summaries = []
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled(config) -> bool:
+        return bool(getattr(config, "TRACE_COMMANDS", False))
+
+    @staticmethod
+    def instrument(executor):
+        """Installs the tracing wrapper on a command executor (idempotent)."""
+        if getattr(executor, "command_tracer_installed", False):
+            return
+        original_execute = executor.execute
+
+        def traced_execute(command, params):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = original_execute(command, params)
+                return response
+            finally:
+                session_id = (params or {}).get("sessionId")
+                if session_id is None and isinstance(response, dict):
+                    # 'newSession' has no session ID yet, the response carries it
+                    value = response.get("value")
+                    session_id = value.get("sessionId") if isinstance(value, dict) else response.get("sessionId")
+                CommandTracer.record(
+                    session_id, command, time.perf_counter() - start,
+                    CommandTracer._size(params), CommandTracer._size(response),
+                )
+
+        executor.execute = traced_execute
+        executor.command_tracer_installed = True
+
+    @staticmethod
+    def record(session_id, command, seconds, bytes_sent=0, bytes_received=0):
+        with CommandTracer._lock:
+            CommandTracer._records[session_id].append((command, seconds, bytes_sent, bytes_received))
+
+    @staticmethod
+    def end_test(session_id, node_id) -> dict:
+        """Builds the summary of the commands sent since the previous test on this session."""
+        with CommandTracer._lock:
+            records = CommandTracer._records.pop(session_id, [])
+
+        histogram = {}
+        for command, seconds, _, _ in records:
+            entry = histogram.setdefault(command, {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += seconds * 1000
+
+        slowest = sorted(records, key=lambda r: r[1], reverse=True)[:CommandTracer.SLOWEST_COUNT]
+        summary = {
+            "node_id": node_id,
+            "session_id": session_id,
+            "commands": len(records),
+            "total_ms": round(sum(r[1] for r in records) * 1000, 1),
+            "bytes_sent": sum(r[2] for r in records),
+            "bytes_received": sum(r[3] for r in records),
+            "slowest": [{"command": r[0], "ms": round(r[1] * 1000, 1)} for r in slowest],
+            "histogram": {
+                command: {"count": v["count"], "total_ms": round(v["total_ms"], 1)}
+                for command, v in sorted(histogram.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+            },
+        }
+
+        with CommandTracer._lock:
+            CommandTracer._summaries.append(summary)
+        CommandTracer.logger.info(
+            f"📡 {summary['commands']} commands | {summary['total_ms']}ms | "
+            f"{summary['bytes_sent']}B sent | {summary['bytes_received']}B received <- {node_id}"
+        )
+        return summary
+
+    @staticmethod
+    def write_report():
+        """Writes this worker's per-test summaries (machine-readable, one file per worker)."""
+        with CommandTracer._lock:
+            summaries = list(CommandTracer._summaries)
+        if not summaries:
+            return
+
+        worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+        report = {
+            "worker": worker,
+            "tests": len(summaries),
+            "commands": sum(s["commands"] for s in summaries),
+            "total_ms": round(sum(s["total_ms"] for s in summaries), 1),
+            "summaries": summaries,
+        }
+        path = os.path.join(Config.ALLURE_RESULTS_DIR, f"command_trace_{worker}.json")
+        try:
+            with open(path, "w") as f:
+                json.dump(report, f)
+        except Exception as e:
+            CommandTracer.logger.warning(f"Command Trace Write Error: {e}")
+
+    @staticmethod
+    def _size(payload) -> int:
+        if not payload:
+            return 0
+        try:
+            return len(json.dumps(payload, default=str))
+        except Exception:
+            return 0
@@ -6,11 +6,48 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from appium import webdriver as appium_driver
 from appium.options.android import UiAutomator2Options
+from utilities.network_rules import NetworkRules
+from utilities.command_executor import SharedCommandExecutor
 
 # Logger Definition
 logger = logging.getLogger("DriverFactory")
 
 class DriverFactory:
+    # Named browser option profiles (selected by BROWSER_PROFILE).
+    # 'full' is the original setup; lean profiles trade visuals for render cost per session.
+    BROWSER_PROFILES = {
+        "full": {
+            "screen": "1920x1080",
+            "page_load_strategy": "normal",
+            "block_images": False,
+            "block_fonts": False,
+            "enable_vnc": True,
+            "headless": False,
+            "lean_flags": False,
+            "maximize": True,
+        },
+        "lean": {
+            "screen": "1366x768",
+            "page_load_strategy": "eager",
+            "block_images": True,
+            "block_fonts": True,
+            "enable_vnc": False,
+            "headless": False,
+            "lean_flags": True,
+            "maximize": False,
+        },
+        "headless-fast": {
+            "screen": "1280x720",
+            "page_load_strategy": "eager",
+            "block_images": True,
+            "block_fonts": True,
+            "enable_vnc": False,
+            "headless": True,
+            "lean_flags": True,
+            "maximize": False,
+        },
+    }
+
     @staticmethod
     def get_driver(config: Any, execution_id: str) -> WebDriver:
         """
@@ -38,8 +75,9 @@ class DriverFactory:
     def _create_web_driver(config: Any, execution_id: str) -> WebDriver:
         browser = config.BROWSER.lower()
         remote_url = config.SELENIUM_REMOTE_URL
+        profile = DriverFactory._get_profile(config)
         
-        logger.info(f"Web Driver is starting: {browser.upper()} | Headless: {config.HEADLESS}")
+        logger.info(f"Web Driver is starting: {browser.upper()} | Headless: {config.HEADLESS} | Profile: {profile['name']}")
 
         # 1. Prepare Browser Options
         options = DriverFactory._get_browser_options(browser, config)
@@ -48,31 +86,79 @@ class DriverFactory:
         if remote_url:
             return DriverFactory._create_remote_web_driver(remote_url, options, execution_id, config)
         else:
-            return DriverFactory._create_local_driver(browser, options)
+            return DriverFactory._create_local_driver(browser, options, maximize=profile["maximize"])
+
+    @staticmethod
+    def _get_profile(config: Any) -> dict:
+        """Resolves the BROWSER_PROFILE name to its option set."""
+        name = getattr(config, "BROWSER_PROFILE", "full").lower()
+        if name not in DriverFactory.BROWSER_PROFILES:
+            raise ValueError(f"❌ Unknown browser profile: {name} (Options: {', '.join(DriverFactory.BROWSER_PROFILES)})")
+        return {"name": name, **DriverFactory.BROWSER_PROFILES[name]}
 
     @staticmethod
     def _get_browser_options(browser: str, config: Any):
-        """Sets standard options specific to the browser."""
+        """Sets standard options specific to the browser, tuned by the selected profile."""
         options = None
+        profile = DriverFactory._get_profile(config)
+        width, height = profile["screen"].split("x")
         
         if browser == "chrome":
             options = ChromeOptions()
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920,1080")
+            options.add_argument(f"--window-size={width},{height}")
             options.add_argument("--disable-notifications")
             options.add_argument("--disable-popup-blocking")
+
+            if profile["block_images"]:
+                options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+            if profile["block_fonts"]:
+                options.add_argument("--disable-remote-fonts")
+            if profile["lean_flags"]:
+                options.add_argument("--disable-extensions")
+                options.add_argument("--disable-background-networking")
+                options.add_argument("--disable-component-update")
+                options.add_argument("--disable-default-apps")
+                options.add_argument("--disable-sync")
+                options.add_argument("--no-first-run")
+                options.add_argument("--mute-audio")
+
+            # Blocked vs allowed request counts are read from the performance log.
+            if NetworkRules.is_enabled(config):
+                options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
             
         elif browser == "firefox":
             options = FirefoxOptions()
-            options.add_argument("--width=1920")
-            options.add_argument("--height=1080")
+            options.add_argument(f"--width={width}")
+            options.add_argument(f"--height={height}")
+
+            if profile["block_images"]:
+                options.set_preference("permissions.default.image", 2)
+            if profile["block_fonts"]:
+                options.set_preference("gfx.downloadable_fonts.enabled", False)
+            if profile["lean_flags"]:
+                options.set_preference("extensions.update.enabled", False)
+                options.set_preference("app.update.auto", False)
+                options.set_preference("network.prefetch-next", False)
+                options.set_preference("browser.safebrowsing.malware.enabled", False)
+                options.set_preference("browser.safebrowsing.phishing.enabled", False)
+                options.set_preference("media.autoplay.default", 5)
+
+            # Firefox fallback: No CDP, so run-level rules are compiled into a PAC script.
+            block, allow = NetworkRules.session_rules(config)
+            if NetworkRules.is_enabled(config) and block:
+                options.set_preference("network.proxy.type", 2)
+                options.set_preference("network.proxy.autoconfig_url", NetworkRules.pac_url(block, allow))
         
         else:
             raise ValueError(f"❌ Unsupported browser type: {browser}")
 
-        if config.HEADLESS:
+        # 'eager': Returns after DOMContentLoaded, does not wait for images/iframes/analytics.
+        options.page_load_strategy = profile["page_load_strategy"]
+
+        if config.HEADLESS or profile["headless"]:
             options.add_argument("--headless")
 
         return options
@@ -83,11 +169,13 @@ class DriverFactory:
         
         mode = getattr(config, "RECORD_VIDEO", "on_failure").lower()
         should_record = mode in ["true", "always", "on_failure", "on_success"]
+        profile = DriverFactory._get_profile(config)
 
         selenoid_options = {
-            "enableVNC": True,
+            "enableVNC": profile["enable_vnc"],
             "enableVideo": should_record,
-            "videoScreenSize": "1920x1080",
+            "screenResolution": f"{profile['screen']}x24",
+            "videoScreenSize": profile["screen"],
             "name": execution_id,
             "labels": {
                 "env": "test", 
@@ -100,7 +188,9 @@ class DriverFactory:
         
         try:
             logger.info(f"Establishing a remote web connection... (Label: {execution_id})")
-            driver = webdriver.Remote(command_executor=remote_url, options=options)
+            # Shared keep-alive executor per worker (traced if TRACE_COMMANDS is on)
+            executor = SharedCommandExecutor.get(remote_url, config.BROWSER.lower())
+            driver = webdriver.Remote(command_executor=executor, options=options)
             
             if should_record:
                 driver.video_name = f"{driver.session_id}.mp4"
@@ -115,7 +205,7 @@ class DriverFactory:
             raise e
 
     @staticmethod
-    def _create_local_driver(browser: str, options: Any) -> WebDriver:
+    def _create_local_driver(browser: str, options: Any, maximize: bool = True) -> WebDriver:
         """Creates local Web WebDriver"""
         try:
             if browser == "chrome":
@@ -126,7 +216,8 @@ class DriverFactory:
                  raise ValueError(f"Unsupported browser for local driver: {browser}")
             
             logger.info("✅ Local Web Driver started successfully.")
-            driver.maximize_window()
+            if maximize:
+                driver.maximize_window()
             return driver
         except Exception as e:
             logger.error(f"❌ The local web driver could not be started! Error: {e}")
@@ -163,7 +254,7 @@ class DriverFactory:
         should_record = mode in ["true", "always", "on_failure", "on_success"]
         
         selenoid_options = {
-            "enableVNC": True,
+            "enableVNC": DriverFactory._get_profile(config)["enable_vnc"],
             "enableVideo": should_record,
             "name": f"Mobile_{execution_id}",
             "labels": {
@@ -182,7 +273,8 @@ class DriverFactory:
 
         try:
             logger.info(f"📱 Starting Android Driver... URL: {remote_url}")
-            driver = appium_driver.Remote(command_executor=remote_url, options=options)
+            executor = SharedCommandExecutor.get(remote_url, "appium")
+            driver = appium_driver.Remote(command_executor=executor, options=options)
             
             if should_record:
                 driver.video_name = f"{driver.session_id}.mp4"
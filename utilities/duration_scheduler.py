@@ -0,0 +1,120 @@
+import logging
+import threading
+from itertools import cycle
+from xdist.scheduler import LoadScheduling
+
+class DurationStore:
+    """
+    Persistent per-test durations (setup + call + teardown) in the pytest cache (.pytest_cache).
+    New measurements are blended with history (EMA) so one slow run does not dominate.
+    """
+
+    CACHE_KEY = "insider/durations"
+    SMOOTHING = 0.5
+
+    logger = logging.getLogger("DurationStore")
+    _current = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def add(node_id, seconds):
+        with DurationStore._lock:
+            DurationStore._current[node_id] = DurationStore._current.get(node_id, 0.0) + seconds
+
+    @staticmethod
+    def load(config) -> dict:
+        cache = getattr(config, "cache", None)
+        return cache.get(DurationStore.CACHE_KEY, {}) if cache else {}
+
+    @staticmethod
+    def save(config):
+        cache = getattr(config, "cache", None)
+        with DurationStore._lock:
+            current, DurationStore._current = DurationStore._current, {}
+        if not cache or not current:
+            return
+
+        durations = DurationStore.load(config)
+        for node_id, seconds in current.items():
+            previous = durations.get(node_id)
+            durations[node_id] = seconds if previous is None else (
+                DurationStore.SMOOTHING * seconds + (1 - DurationStore.SMOOTHING) * previous
+            )
+        cache.set(DurationStore.CACHE_KEY, durations)
+        DurationStore.logger.info(f"⏱️ Stored durations for {len(current)} test(s).")
+
+class DurationScheduling(LoadScheduling):
+    """
+    [ARCHITECTURE: LPT (Longest Processing Time First) Scheduling]
+    1. Pending tests are ordered by historical duration, longest first.
+       Unknown tests get the average known duration.
+    2. Every worker holds at most 2 tests (running + next). When a worker finishes one,
+       it receives the longest remaining test, so long UI workflows never land last.
+    """
+
+    def __init__(self, config, log=None, durations=None):
+        super().__init__(config, log)
+        self.durations = durations or {}
+
+    @staticmethod
+    def create(config, log):
+        """Returns the scheduler, or None to fall back to xdist's default (no history / other dist mode)."""
+        if config.getvalue("dist") != "load":
+            return None
+        durations = DurationStore.load(config)
+        if not durations:
+            return None
+        return DurationScheduling(config, log, durations)
+
+    def schedule(self):
+        assert self.collection_is_completed
+
+        # Initial distribution already happened, reschedule on all nodes
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        if not self.collection:
+            return
+
+        known = [self.durations[n] for n in self.collection if n in self.durations]
+        default = sum(known) / len(known) if known else 0.0
+        self.pending[:] = sorted(
+            range(len(self.collection)),
+            key=lambda index: self.durations.get(self.collection[index], default),
+            reverse=True,
+        )
+        self.log(f"LPT order: {len(known)}/{len(self.collection)} tests with history")
+
+        if len(self.pending) < 2 * len(self.nodes):
+            # Fewer tests than slots: one each, longest first, so every worker gets work.
+            nodes = cycle(self.nodes)
+            for _ in range(len(self.pending)):
+                self._send_tests(next(nodes), 1)
+        else:
+            for node in self.nodes:
+                self.check_schedule(node)
+
+        if not self.pending:
+            for node in self.nodes:
+                node.shutdown()
+
+    def check_schedule(self, node, duration=0):
+        if node.shutting_down:
+            return
+
+        if self.pending:
+            # Keep exactly 2 per node (running + next): the rest stays in the global LPT queue.
+            node_pending = self.node2pending[node]
+            if len(node_pending) < 2:
+                self._send_tests(node, 2 - len(node_pending))
+        else:
+            node.shutdown()
+
+        self.log("num items waiting for node:", len(self.pending))
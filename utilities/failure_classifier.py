@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import logging
+from config import Config
+
+class FailureClassifier:
+    """
+    [ARCHITECTURE: Offline Fast-Path Before the LLM]
+    1. Known failure categories are matched by regex against the error extract (zero latency, zero cost).
+    2. A match is rendered as the same 3-heading Markdown the LLM is asked for (ReportHelper input).
+       Named regex groups can be used in the texts, e.g. '{option}'.
+    3. Teams add their own rules in AI_RULES_FILE (JSON list, same keys as RULES). They are checked
+       before the built-in ones. Only unmatched failures reach the model.
+    """
+
+    MODEL_NAME = "Rule Engine (offline)"
+
+    RULES = [
+        {
+            "id": "driver_setup",
+            "pattern": r"SessionNotCreatedException|\[SETUP ERROR\]|'NoneType' object has no attribute '(?:get|find_elements?|current_url|title|execute_script|current_window_handle)'",
+            "summary": "The browser session could not be created, so the test ran without a driver.",
+            "root_cause": "The `driver` fixture logged a setup error: Selenoid refused or could not start the browser container "
+                          "(session limit / queue full, missing browser image, Docker out of resources).",
+            "solution": "- Check `logs/` and the Selenoid UI for the session error.\n"
+                        "- Make sure the image in `config/browsers_*.json` is pulled.\n"
+                        "- Keep Selenoid `-limit` >= worker count (x2 with `SESSION_PREFETCH`), or use `CAPACITY_MODE=auto`.",
+        },
+        {
+            "id": "selenoid_unreachable",
+            "pattern": r"MaxRetryError|NewConnectionError|Connection refused|RemoteDisconnected|ProtocolError",
+            "summary": "The WebDriver command could not reach Selenoid.",
+            "root_cause": "The Selenoid hub (or the browser container behind it) is down, restarting or was killed (OOM).",
+            "solution": "- Check `docker ps` / Selenoid logs for restarts.\n"
+                        "- Verify `SELENIUM_REMOTE_URL` and the `shared-network` Docker network.\n"
+                        "- Lower the worker count if the host is out of memory.",
+        },
+        {
+            "id": "dropdown_option_missing",
+            "pattern": r"Could not select '(?P<option>[^']*)' after (?P<timeout>\d+) seconds",
+            "summary": "The option '{option}' never appeared in the filter dropdown within {timeout}s.",
+            "root_cause": "The dropdown options are loaded asynchronously. Either the data arrived late, "
+                          "or the option text changed on the site (renamed location/department).",
+            "solution": "- Open the careers page and compare the option text with '{option}'.\n"
+                        "- If the text is right, the backend is slow: raise the `try_select_dropdown` timeout.\n"
+                        "- If the text changed, update the test data.",
+        },
+        {
+            "id": "new_window_missing",
+            "pattern": r"NoSuchWindowException|waiting for new window",
+            "summary": "The expected new browser window/tab was not available.",
+            "root_cause": "'View Role' did not open a second tab (link changed to same-tab navigation, popup blocked), "
+                          "or the window was closed before the driver switched to it.",
+            "solution": "- Check the `target` of the 'View Role' link.\n"
+                        "- Keep the original handle and wait for `number_of_windows_to_be(2)` before switching.",
+        },
+        {
+            "id": "redirect_failed",
+            "pattern": r"Redirect Check Failed! URL '(?P<url>[^']*)'",
+            "summary": "'View Role' opened '{url}' instead of the Lever application form.",
+            "root_cause": "The job links no longer point to lever.co (ATS change) or the redirect was slower than 10s.",
+            "solution": "- Open the job link manually and confirm the target domain.\n"
+                        "- Update the expected domain in `verify_view_role_redirect` if the ATS changed.",
+        },
+        {
+            "id": "strict_job_mismatch",
+            "pattern": r"STRICT FAIL: (?P<field>\w+) '(?P<actual>[^']*)' does not contain '(?P<expected>[^']*)'",
+            "summary": "A listed job has {field} '{actual}', expected '{expected}'.",
+            "root_cause": "The filters were not applied to the whole list (list checked before it re-rendered) "
+                          "or the site really lists jobs outside the filter.",
+            "solution": "- Check the 'Filters Applied Result' screenshot.\n"
+                        "- Make sure `wait_for_dom_settled(JOB_LIST_CONTAINER)` runs after the last filter.",
+        },
+        {
+            "id": "no_jobs",
+            "pattern": r"No jobs found!",
+            "summary": "The job list was empty after filtering.",
+            "root_cause": "There are currently no open positions for this filter, or the list failed to load.",
+            "solution": "- Check the 'FAIL - No Jobs Found' screenshot and the careers page manually.\n"
+                        "- Use a filter that is known to have open positions.",
+        },
+        {
+            "id": "stale_element",
+            "pattern": r"StaleElementReferenceException|stale element reference",
+            "summary": "An element was used after the page re-rendered it.",
+            "root_cause": "The DOM node was replaced between lookup and use (e.g. the job list re-renders after filtering).",
+            "solution": "- Re-locate the element after `wait_for_dom_settled()`.\n"
+                        "- Prefer `snapshot_rows()` to read lists in one round trip.",
+        },
+        {
+            "id": "click_intercepted",
+            "pattern": r"ElementClickInterceptedException|element click intercepted",
+            "summary": "The click landed on another element.",
+            "root_cause": "An overlay (cookie banner, sticky header, modal) covered the target element.",
+            "solution": "- Make sure `handle_cookies()` ran.\n"
+                        "- Scroll the element into view (`block: 'center'`) before clicking.",
+        },
+        {
+            "id": "element_timeout",
+            "pattern": r"TimeoutException|NoSuchElementException",
+            "summary": "An element or condition did not appear in time.",
+            "root_cause": "The locator no longer matches (page changed), the page loaded slowly, "
+                          "or a blocked request (NETWORK_RULES) prevented the content from rendering.",
+            "solution": "- Check the locator in `InsiderLocators` against the live page.\n"
+                        "- Look at the last screenshot and the wait statistics (`wait_stats_*.json`).\n"
+                        "- Retry with `NETWORK_RULES=false` to rule out request blocking.",
+        },
+    ]
+
+    logger = logging.getLogger("FailureClassifier")
+    _rules = None
+
+    @staticmethod
+    def classify(error_text):
+        """Returns the Markdown analysis of the first matching rule, or None (-> LLM)."""
+        # pytest's 'E ' lines carry the error; the echoed source lines would cause false matches
+        error_lines = [line for line in (error_text or "").splitlines() if line.startswith("E ")]
+        text = "\n".join(error_lines) if error_lines else (error_text or "")
+
+        for rule, pattern in FailureClassifier._compiled():
+            match = pattern.search(text)
+            if match:
+                FailureClassifier.logger.info(f"📚 Known failure '{rule['id']}' (no model call)")
+                return FailureClassifier._render(rule, match)
+        return None
+
+    @staticmethod
+    def _render(rule, match) -> str:
+        values = {key: value or "" for key, value in match.groupdict().items()}
+
+        def fill(text):
+            try:
+                return text.format(**values)
+            except (KeyError, IndexError, ValueError):
+                return text
+
+        return (
+            f"**1. Error Summary**\n{fill(rule['summary'])}\n\n"
+            f"**2. Root Cause**\n{fill(rule['root_cause'])}\n\n"
+            f"**3. Solution**\n{fill(rule['solution'])}\n\n"
+            f"_Matched rule: `{rule['id']}`_"
+        )
+
+    @staticmethod
+    def _compiled() -> list:
+        if FailureClassifier._rules is None:
+            rules = []
+            for rule in FailureClassifier._load_user_rules() + FailureClassifier.RULES:
+                try:
+                    rules.append((rule, re.compile(rule["pattern"], re.S)))
+                except (KeyError, re.error) as e:
+                    FailureClassifier.logger.warning(f"Invalid failure rule {rule.get('id', '?')}: {e}")
+            FailureClassifier._rules = rules
+        return FailureClassifier._rules
+
+    @staticmethod
+    def _load_user_rules() -> list:
+        path = Config.AI_RULES_FILE
+        if not path or not os.path.exists(path):
+            return []
+        try:
+            with open(path, encoding="utf-8") as f:
+                rules = json.load(f)
+            required = ("id", "pattern", "summary", "root_cause", "solution")
+            valid = [rule for rule in rules if all(key in rule for key in required)]
+            if len(valid) != len(rules):
+                FailureClassifier.logger.warning(f"{len(rules) - len(valid)} rule(s) in {path} skipped (required keys: {required})")
+            return valid
+        except (OSError, ValueError, TypeError) as e:
+            FailureClassifier.logger.warning(f"Failure Rules Load Error ({path}): {e}")
+            return []
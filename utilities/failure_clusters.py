@@ -0,0 +1,60 @@
+import os
+import hashlib
+from utilities.analysis_cache import AnalysisCache
+from utilities.shared_state import SharedState
+
+class FailureClusters:
+    """
+    [ARCHITECTURE: Session-Level Failure Clustering]
+    1. Cluster key = normalized error lines (AnalysisCache.signature of pytest's 'E ' lines, so test names
+       and source echo do not split clusters) + the failing locator, if the message names one.
+    2. The first failure of a cluster claims it in a run-wide state file (all xdist workers);
+       only the claimer runs the AI analysis, later members just join. If that analysis fails
+       (error, AI budget, AI_QUEUE_TIMEOUT), the next member of the cluster takes the claim over.
+    3. At session end the controller attaches the cluster's analysis and a summary page to every member.
+    """
+
+    LOCATOR_PATTERN = AnalysisCache.LOCATOR_PATTERN
+
+    @staticmethod
+    def describe(error_text) -> dict:
+        """{'cluster', 'locator', 'signature'} of a failure."""
+        signature, locator = AnalysisCache.failure_signature(error_text)
+        cluster = hashlib.sha1(f"{signature}|{locator}".encode("utf-8")).hexdigest()[:12]
+        return {"cluster": cluster, "locator": locator, "signature": signature}
+
+    @staticmethod
+    def claim(cluster) -> bool:
+        """
+        True if this failure should run the cluster's analysis (across all workers):
+        the first failure of the cluster, or a later one after the claimer's analysis failed.
+        """
+        with FailureClusters._claims() as claims:
+            claim = claims.get(cluster)
+            if claim is None or claim["state"] == "failed":
+                members = claim["members"] + 1 if claim else 1
+                claims[cluster] = {"state": "in_progress", "members": members}
+                return True
+            claim["members"] += 1
+            return False
+
+    @staticmethod
+    def finish(cluster, succeeded):
+        """Closes the claim; a failed one (error, AI budget, queue timeout) is taken over by the next member."""
+        with FailureClusters._claims() as claims:
+            claim = claims.setdefault(cluster, {"members": 1})
+            claim["state"] = "done" if succeeded else "failed"
+
+    @staticmethod
+    def _claims():
+        return SharedState.locked(os.path.join(SharedState.run_directory("ai-clusters"), "claims.json"), dict)
+
+    @staticmethod
+    def summary_markdown(cluster, members, locator, signature) -> str:
+        rows = "\n".join(f"| {index} | `{node_id}` |" for index, node_id in enumerate(members, start=1))
+        return (
+            f"**Cluster `{cluster}`: {len(members)} failing test(s) share this root cause.**\n\n"
+            f"**Failing locator:** `{locator or 'n/a'}`\n\n"
+            f"**Normalized error:**\n```\n{signature[:800]}\n```\n\n"
+            f"| # | Test |\n|---|---|\n{rows}"
+        )
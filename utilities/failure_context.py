@@ -0,0 +1,235 @@
+import os
+import re
+import logging
+from config import Config
+from utilities.failure_clusters import FailureClusters
+
+# Make dependencies optional
+try:
+    from allure_commons import plugin_manager as allure_plugins
+except ImportError:
+    allure_plugins = None
+
+# Outer HTML around the locator target, cleaned in the browser (one round trip).
+# If the target is missing, the locator is shortened step by step to its nearest existing ancestor.
+DOM_EXCERPT_JS = """
+const [strategy, value, maxChars] = arguments;
+function find(selector) {
+    try {
+        if (strategy === 'xpath') {
+            return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        if (strategy === 'id') return document.getElementById(selector);
+        if (strategy === 'name') return document.querySelector('[name="' + CSS.escape(selector) + '"]');
+        if (strategy === 'class name') return document.getElementsByClassName(selector)[0] || null;
+        return document.querySelector(selector);
+    } catch (e) { return null; }
+}
+let selector = value, target = find(selector);
+const found = !!target;
+const separator = strategy === 'xpath' ? /\\/+[^\\/\\[\\]]*(\\[[^\\]]*\\])*$/ : /\\s*[> +~]?\\s*[^\\s>+~]+$/;
+while (!target && selector && (strategy === 'xpath' || strategy === 'css selector')) {
+    const shorter = selector.replace(separator, '');
+    if (shorter === selector) break;
+    selector = shorter;
+    target = selector ? find(selector) : null;
+}
+const root = (target && target.parentElement) || target || document.body;
+const clone = root.cloneNode(true);
+clone.querySelectorAll('script, style, svg, noscript, iframe, link, meta').forEach(node => node.remove());
+clone.querySelectorAll('*').forEach(node => {
+    for (const attribute of Array.from(node.attributes)) {
+        if (attribute.name === 'style' || attribute.value.length > 120) node.removeAttribute(attribute.name);
+    }
+});
+return {found: found, anchor: target ? selector : 'body', html: clone.outerHTML.replace(/\\s+/g, ' ').slice(0, maxChars)};
+"""
+
+class FailureContext:
+    """
+    [ARCHITECTURE: Token-Lean Failure Context for AI Prompts]
+    1. Instead of the tail of pytest's longrepr, the prompt is built from the failure itself:
+       - exception chain (__cause__ / __context__), as pytest-style 'E ' lines (rules & clusters read them),
+       - the failing page-object step (deepest failed Allure step, else the innermost pages/ frame),
+       - the locator involved (frame locals, else the exception message),
+       - the project frames of the traceback (no pytest/pluggy/selenium internals),
+       - optionally a cleaned DOM excerpt around the target (AI_CONTEXT_DOM, one browser round trip).
+    2. Sections are added in that priority order under AI_CONTEXT_TOKENS (~4 chars per token):
+       the exception chain is always kept, frames are cut from the outside, the DOM gets what is left.
+    3. Only failures call this; a broken extraction falls back to the trimmed longrepr tail.
+    """
+
+    CHARS_PER_TOKEN = 4
+    MAX_CHAIN = 3
+    MAX_MESSAGE_CHARS = 400
+    MAX_FRAMES = 6
+    MIN_DOM_CHARS = 200
+    LOCATOR_NAMES = ("locator", "select_locator", "row_locator", "label")
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    DOM_HEADER = "--- DOM EXCERPT"
+    PAGE_FRAME_PATTERN = re.compile(r"^(pages/[\w/]+\.py):\d+ in (\w+)", re.M)
+
+    logger = logging.getLogger("FailureContext")
+
+    @staticmethod
+    def build(call, rep, driver=None) -> str:
+        """Compact prompt payload of a failed test call (within AI_CONTEXT_TOKENS)."""
+        budget = Config.AI_CONTEXT_TOKENS * FailureContext.CHARS_PER_TOKEN
+        try:
+            if call.excinfo is None:
+                raise ValueError("no exception info")
+            frames = FailureContext._project_frames(call.excinfo)
+            locator = FailureContext._locator(frames, call.excinfo.value)
+            sections = [
+                ("EXCEPTION CHAIN", FailureContext._exception_chain(call.excinfo.value)),
+                ("FAILING STEP", FailureContext._failing_step(frames)),
+                ("LOCATOR", repr(locator) if locator else ""),
+            ]
+        except Exception as e:
+            FailureContext.logger.warning(f"Failure context extraction failed, using the log tail: {e}")
+            long_repr = str(rep.longrepr)
+            return long_repr[-budget:]
+
+        payload = ""
+        for title, body in sections:
+            if body:
+                payload += FailureContext._section(title, body)
+        payload = payload[:budget]
+
+        frame_lines = [FailureContext._format_frame(entry) for entry in frames][-FailureContext.MAX_FRAMES:]
+        while frame_lines and len(payload) + len(FailureContext._section("STACK (project frames)", "\n".join(frame_lines))) > budget:
+            frame_lines.pop(0)
+        if frame_lines:
+            payload += FailureContext._section("STACK (project frames)", "\n".join(frame_lines))
+
+        remaining = budget - len(payload) - 100
+        if Config.AI_CONTEXT_DOM and driver is not None and locator and remaining >= FailureContext.MIN_DOM_CHARS:
+            excerpt = FailureContext._dom_excerpt(driver, locator, remaining)
+            if excerpt:
+                payload += excerpt
+        return payload.rstrip()
+
+    @staticmethod
+    def page_object(payload) -> str:
+        """'pages/<file>.py::<method>' of the innermost page-object frame of a payload (or the failing step)."""
+        matches = FailureContext.PAGE_FRAME_PATTERN.findall(payload or "")
+        if matches:
+            return "::".join(matches[-1])
+        step = re.search(r"^--- FAILING STEP ---\n(.+)$", payload or "", re.M)
+        return step.group(1).strip() if step else ""
+
+    @staticmethod
+    def _section(title, body) -> str:
+        return f"--- {title} ---\n{body}\n"
+
+    # --- EXCEPTION CHAIN ---
+    @staticmethod
+    def _exception_chain(exception) -> str:
+        chain, seen = [], set()
+        while exception is not None and id(exception) not in seen and len(chain) < FailureContext.MAX_CHAIN:
+            seen.add(id(exception))
+            chain.append(exception)
+            exception = exception.__cause__ or (None if exception.__suppress_context__ else exception.__context__)
+
+        lines = []
+        for index, error in enumerate(chain):
+            name = type(error).__qualname__
+            module = type(error).__module__
+            if module not in ("builtins", "__builtin__"):
+                name = f"{module}.{name}"
+            # Selenium appends the driver's native stack trace to the message: no value for the model
+            message = str(error).split("Stacktrace:", 1)[0].strip()
+            if len(message) > FailureContext.MAX_MESSAGE_CHARS:
+                message = message[:FailureContext.MAX_MESSAGE_CHARS] + " ..."
+            prefix = "" if index == 0 else "(caused by) "
+            message_lines = message.splitlines() or [""]
+            lines.append(f"E   {prefix}{name}: {message_lines[0]}")
+            lines.extend(f"E   {line}" for line in message_lines[1:] if line.strip())
+        return "\n".join(lines)
+
+    # --- TRACEBACK ---
+    @staticmethod
+    def _project_frames(excinfo) -> list:
+        frames = []
+        for entry in excinfo.traceback:
+            path = os.path.abspath(str(entry.path))
+            if path.startswith(FailureContext.PROJECT_ROOT + os.sep) and "site-packages" not in path:
+                frames.append(entry)
+        return frames
+
+    @staticmethod
+    def _relative(entry) -> str:
+        return os.path.relpath(os.path.abspath(str(entry.path)), FailureContext.PROJECT_ROOT)
+
+    @staticmethod
+    def _format_frame(entry) -> str:
+        try:
+            statement = str(entry.statement).strip().splitlines()[0]
+        except Exception:
+            statement = ""
+        line = f"{FailureContext._relative(entry)}:{entry.lineno + 1} in {entry.name}"
+        return f"{line} -> {statement[:160]}" if statement else line
+
+    @staticmethod
+    def _locator(frames, exception):
+        """Innermost (By, value) tuple in the frame locals, else the one named in the message."""
+        strategies = {"id", "xpath", "css selector", "class name", "name", "tag name", "link text", "partial link text"}
+        for entry in reversed(frames):
+            try:
+                local_values = entry.locals
+            except Exception:
+                continue
+            for name in FailureContext.LOCATOR_NAMES:
+                value = local_values.get(name)
+                if isinstance(value, tuple) and len(value) == 2 and value[0] in strategies and isinstance(value[1], str):
+                    return value
+        match = FailureClusters.LOCATOR_PATTERN.search(str(exception))
+        return (match.group(1), match.group(3)) if match else None
+
+    # --- ALLURE STEP ---
+    @staticmethod
+    def _failing_step(frames) -> str:
+        step = FailureContext._allure_failed_step()
+        if step:
+            return step
+        # Fallback: innermost page-object method of the traceback
+        for entry in reversed(frames):
+            if FailureContext._relative(entry).startswith("pages" + os.sep):
+                return f"{entry.name} ({FailureContext._relative(entry)}:{entry.lineno + 1})"
+        return ""
+
+    @staticmethod
+    def _allure_failed_step() -> str:
+        """Path of the deepest failed/broken step of the running Allure test ('Parent > Child')."""
+        if allure_plugins is None:
+            return ""
+        try:
+            for plugin in allure_plugins.get_plugins():
+                reporter = getattr(plugin, "allure_logger", None)
+                test = reporter.get_test(None) if reporter is not None else None
+                if test is None:
+                    continue
+                path, steps = [], test.steps
+                while steps:
+                    failed = [step for step in steps if step.status in ("failed", "broken")]
+                    if not failed:
+                        break
+                    path.append(failed[-1].name)
+                    steps = failed[-1].steps
+                return " > ".join(path)
+        except Exception as e:
+            FailureContext.logger.debug(f"Allure step lookup failed: {e}")
+        return ""
+
+    # --- DOM ---
+    @staticmethod
+    def _dom_excerpt(driver, locator, max_chars) -> str:
+        try:
+            result = driver.execute_script(DOM_EXCERPT_JS, locator[0], locator[1], max_chars)
+        except Exception as e:
+            FailureContext.logger.debug(f"DOM excerpt failed: {e}")
+            return ""
+        if not result or not result.get("html"):
+            return ""
+        anchor = "target" if result.get("found") else f"target missing, nearest match: {result.get('anchor')}"
+        return FailureContext._section(f"{FailureContext.DOM_HEADER[4:]} ({anchor})", result["html"])
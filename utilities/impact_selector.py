@@ -0,0 +1,326 @@
+import os
+import ast
+import sys
+import hashlib
+import logging
+import subprocess
+import threading
+import pytest
+from config import Config
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ImpactSelector:
+    """
+    [ARCHITECTURE: Test Impact Selection (IMPACT_MODE)]
+    1. 'record': Every test (and every fixture it uses) is traced. The project files it executed
+       (pages/, utilities/, locators/, tests/) and the InsiderLocators constants referenced by the
+       executed code are stored in the pytest cache ('insider/impact').
+    2. 'select': Changed files come from 'git diff IMPACT_BASE' (or, without git, from file
+       fingerprints taken while recording). Only tests that touched a changed file run.
+       A change in insider_locators.py is narrowed down to the constants whose value changed.
+    3. Unknown (new) tests always run. A change in a global file (conftest, config, ini) runs everything.
+    """
+
+    CACHE_KEY = "insider/impact"
+    TRACKED_DIRS = ("pages/", "utilities/", "locators/", "tests/")
+    GLOBAL_FILES = ("tests/conftest.py", "config.py", "pytest.ini", "requirements.txt")
+    LOCATORS_FILE = "locators/insider_locators.py"
+    LOCATORS_CLASS = "InsiderLocators"
+
+    logger = logging.getLogger("ImpactSelector")
+    _tests = {}
+    _fixtures = {}
+    _stack = []
+    _code_info = {}
+    _locator_names = None
+    _tool_id = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_recording(config) -> bool:
+        return getattr(config, "IMPACT_MODE", "off") == "record"
+
+    @staticmethod
+    def is_selecting(config) -> bool:
+        return getattr(config, "IMPACT_MODE", "off") == "select"
+
+    # --- RECORDING ---
+    @staticmethod
+    def start_context():
+        """Opens a recording scope (a test or a fixture setup). Scopes nest: inner code counts for all."""
+        with ImpactSelector._lock:
+            ImpactSelector._stack.append(set())
+        ImpactSelector._install()
+
+    @staticmethod
+    def end_test(node_id, fixture_names):
+        files, locators = ImpactSelector._end_context()
+        with ImpactSelector._lock:
+            ImpactSelector._tests[node_id] = {
+                "files": sorted(files),
+                "locators": sorted(locators),
+                "fixtures": sorted(fixture_names),
+            }
+
+    @staticmethod
+    def end_fixture(fixture_name):
+        # Session fixtures are set up once (inside the first test): every later user of the fixture inherits its files
+        files, _ = ImpactSelector._end_context()
+        with ImpactSelector._lock:
+            ImpactSelector._fixtures.setdefault(fixture_name, set()).update(files)
+
+    @staticmethod
+    def collect() -> dict:
+        """Recorded data of this process (sent from xdist workers to the controller)."""
+        with ImpactSelector._lock:
+            return {
+                "tests": dict(ImpactSelector._tests),
+                "fixtures": {name: sorted(files) for name, files in ImpactSelector._fixtures.items()},
+            }
+
+    @staticmethod
+    def merge(payload):
+        if not payload:
+            return
+        with ImpactSelector._lock:
+            ImpactSelector._tests.update(payload.get("tests", {}))
+            for name, files in payload.get("fixtures", {}).items():
+                ImpactSelector._fixtures.setdefault(name, set()).update(files)
+
+    @staticmethod
+    def save(config):
+        ImpactSelector._uninstall()
+        data = ImpactSelector.collect()
+        cache = getattr(config, "cache", None)
+        if not cache or not data["tests"]:
+            return
+
+        impact = cache.get(ImpactSelector.CACHE_KEY, {})
+        impact.setdefault("tests", {}).update(data["tests"])
+        fixtures = impact.setdefault("fixtures", {})
+        for name, files in data["fixtures"].items():
+            fixtures[name] = sorted(set(fixtures.get(name, [])) | set(files))
+        impact["fingerprints"] = ImpactSelector._fingerprints()
+        impact["locators"] = ImpactSelector._locator_sources(ImpactSelector._read(ImpactSelector.LOCATORS_FILE))
+        cache.set(ImpactSelector.CACHE_KEY, impact)
+        ImpactSelector.logger.info(f"🧭 Impact map updated for {len(data['tests'])} test(s).")
+
+    # --- SELECTION ---
+    @staticmethod
+    def select(config, items) -> tuple:
+        """Splits collected items into (selected, deselected)."""
+        cache = getattr(config, "cache", None)
+        impact = cache.get(ImpactSelector.CACHE_KEY, {}) if cache else {}
+        if not impact.get("tests"):
+            ImpactSelector.logger.warning("🧭 No impact map recorded yet (IMPACT_MODE=record). Running all tests.")
+            return items, []
+
+        changed, base_locators = ImpactSelector._changed_files(impact)
+        if changed is None:
+            ImpactSelector.logger.warning("🧭 Changed files unknown. Running all tests.")
+            return items, []
+
+        global_changes = [path for path in changed if path in ImpactSelector.GLOBAL_FILES]
+        if global_changes:
+            ImpactSelector.logger.info(f"🧭 Global file changed ({', '.join(global_changes)}). Running all tests.")
+            return items, []
+
+        changed_locators = set()
+        if ImpactSelector.LOCATORS_FILE in changed:
+            current = ImpactSelector._locator_sources(ImpactSelector._read(ImpactSelector.LOCATORS_FILE))
+            changed_locators = {
+                name for name in set(base_locators) | set(current)
+                if base_locators.get(name) != current.get(name)
+            }
+            changed.discard(ImpactSelector.LOCATORS_FILE)
+
+        selected, deselected = [], []
+        for item in items:
+            entry = impact["tests"].get(item.nodeid)
+            if entry is None or ImpactSelector._is_affected(entry, impact.get("fixtures", {}), changed, changed_locators):
+                selected.append(item)
+            else:
+                deselected.append(item)
+
+        ImpactSelector.logger.info(
+            f"🧭 Impact selection: {len(selected)} selected, {len(deselected)} deselected | "
+            f"Changed files: {len(changed)} | Changed locators: {', '.join(sorted(changed_locators)) or '-'}"
+        )
+        return selected, deselected
+
+    @staticmethod
+    def _is_affected(entry, fixtures, changed, changed_locators) -> bool:
+        files = set(entry["files"])
+        for name in entry.get("fixtures", []):
+            files.update(fixtures.get(name, []))
+        if files & changed:
+            return True
+        return bool(set(entry.get("locators", [])) & changed_locators)
+
+    @staticmethod
+    def _changed_files(impact) -> tuple:
+        """
+        Returns (changed project files, locator sources of the base version).
+        IMPACT_BASE set + git available -> git diff; otherwise fingerprints of the recording run.
+        """
+        if Config.IMPACT_BASE:
+            try:
+                diff = subprocess.run(
+                    ["git", "diff", "--name-only", Config.IMPACT_BASE, "--"],
+                    cwd=PROJECT_ROOT, capture_output=True, text=True, check=True, timeout=30,
+                )
+                base_source = subprocess.run(
+                    ["git", "show", f"{Config.IMPACT_BASE}:{ImpactSelector.LOCATORS_FILE}"],
+                    cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=30,
+                )
+                changed = {line.strip() for line in diff.stdout.splitlines() if line.strip()}
+                return changed, ImpactSelector._locator_sources(base_source.stdout if base_source.returncode == 0 else "")
+            except (OSError, subprocess.SubprocessError) as e:
+                ImpactSelector.logger.warning(f"🧭 git diff against '{Config.IMPACT_BASE}' failed ({e}). Using fingerprints.")
+
+        recorded = impact.get("fingerprints")
+        if not recorded:
+            return None, {}
+        current = ImpactSelector._fingerprints()
+        changed = {path for path in set(recorded) | set(current) if recorded.get(path) != current.get(path)}
+        return changed, impact.get("locators", {})
+
+    # --- TRACING ---
+    @staticmethod
+    def _install():
+        """sys.monitoring (3.12+) reports each code object once per scope; sys.settrace is the fallback."""
+        if ImpactSelector._tool_id is not None:
+            sys.monitoring.restart_events()
+            return
+        if sys.gettrace() is ImpactSelector._trace:
+            return
+
+        monitoring = getattr(sys, "monitoring", None)
+        if monitoring is not None:
+            for tool_id in (monitoring.COVERAGE_ID, 3, 4):
+                try:
+                    monitoring.use_tool_id(tool_id, "impact-selector")
+                except ValueError:
+                    continue
+                monitoring.register_callback(tool_id, monitoring.events.PY_START, ImpactSelector._on_start)
+                monitoring.set_events(tool_id, monitoring.events.PY_START)
+                ImpactSelector._tool_id = tool_id
+                return
+
+        sys.settrace(ImpactSelector._trace)
+        threading.settrace(ImpactSelector._trace)
+
+    @staticmethod
+    def _uninstall():
+        if ImpactSelector._tool_id is not None:
+            sys.monitoring.set_events(ImpactSelector._tool_id, 0)
+            sys.monitoring.free_tool_id(ImpactSelector._tool_id)
+            ImpactSelector._tool_id = None
+        elif sys.gettrace() is ImpactSelector._trace:
+            sys.settrace(None)
+            threading.settrace(None)
+
+    @staticmethod
+    def _on_start(code, offset):
+        ImpactSelector._note(code)
+        return sys.monitoring.DISABLE
+
+    @staticmethod
+    def _trace(frame, event, arg):
+        if event == "call":
+            ImpactSelector._note(frame.f_code)
+        return None
+
+    @staticmethod
+    def _note(code):
+        stack = ImpactSelector._stack
+        if stack and ImpactSelector._info(code) is not None:
+            for scope in stack:
+                scope.add(code)
+
+    @staticmethod
+    def _info(code):
+        """(project relative path, referenced locator names) or None for non-project code. Cached per code object."""
+        info = ImpactSelector._code_info.get(code, False)
+        if info is not False:
+            return info
+
+        info = None
+        path = code.co_filename
+        if path.startswith(PROJECT_ROOT):
+            relative = os.path.relpath(path, PROJECT_ROOT).replace(os.sep, "/")
+            if relative.startswith(ImpactSelector.TRACKED_DIRS) and path != os.path.abspath(__file__):
+                info = (relative, frozenset(code.co_names) & ImpactSelector._locators())
+        ImpactSelector._code_info[code] = info
+        return info
+
+    @staticmethod
+    def _end_context() -> tuple:
+        with ImpactSelector._lock:
+            scope = ImpactSelector._stack.pop() if ImpactSelector._stack else set()
+        files, locators = set(), set()
+        for code in scope:
+            relative, names = ImpactSelector._code_info[code]
+            files.add(relative)
+            locators.update(names)
+        return files, locators
+
+    # --- FILES & LOCATORS ---
+    @staticmethod
+    def _locators() -> frozenset:
+        if ImpactSelector._locator_names is None:
+            ImpactSelector._locator_names = frozenset(
+                ImpactSelector._locator_sources(ImpactSelector._read(ImpactSelector.LOCATORS_FILE))
+            )
+        return ImpactSelector._locator_names
+
+    @staticmethod
+    def _locator_sources(source) -> dict:
+        """{CONSTANT: normalized source of its value} of the locator class (comments/formatting ignored)."""
+        try:
+            tree = ast.parse(source or "")
+        except SyntaxError:
+            return {}
+        sources = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef) and node.name == ImpactSelector.LOCATORS_CLASS:
+                for statement in node.body:
+                    if isinstance(statement, ast.Assign):
+                        for target in statement.targets:
+                            if isinstance(target, ast.Name):
+                                sources[target.id] = ast.unparse(statement.value)
+        return sources
+
+    @staticmethod
+    def _fingerprints() -> dict:
+        fingerprints = {}
+        for directory in [d.rstrip("/") for d in ImpactSelector.TRACKED_DIRS]:
+            for root, _, names in os.walk(os.path.join(PROJECT_ROOT, directory)):
+                for name in names:
+                    if name.endswith(".py"):
+                        relative = os.path.relpath(os.path.join(root, name), PROJECT_ROOT).replace(os.sep, "/")
+                        fingerprints[relative] = hashlib.sha1(ImpactSelector._read(relative).encode()).hexdigest()
+        for relative in ImpactSelector.GLOBAL_FILES:
+            fingerprints[relative] = hashlib.sha1(ImpactSelector._read(relative).encode()).hexdigest()
+        return fingerprints
+
+    @staticmethod
+    def _read(relative) -> str:
+        try:
+            with open(os.path.join(PROJECT_ROOT, relative), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+class ImpactFixtureRecorder:
+    """
+    Registered as a global plugin in record mode: session fixtures are set up on the Session node,
+    where hooks of tests/conftest.py are not called.
+    """
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        ImpactSelector.start_context()
+        yield
+        ImpactSelector.end_fixture(fixturedef.argname)
@@ -0,0 +1,189 @@
+import os
+import time
+import random
+import logging
+import threading
+from config import Config
+from utilities.shared_state import SharedState
+
+# Make dependencies optional
+try:
+    from google import genai
+except ImportError:
+    genai = None
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+class AIBudgetExceeded(Exception):
+    """The run-wide AI call/token budget is used up (or the rate limit wait would pass the deadline)."""
+
+class LLMClients:
+    """
+    [ARCHITECTURE: Pooled LLM Clients + Run-Wide Budget]
+    1. One long-lived client per provider and worker: connections (TLS) stay open between analyses.
+    2. 429 and 5xx answers (and dropped connections) are retried with full-jitter exponential backoff
+       (AI_RETRIES, AI_RETRY_BACKOFF), honoring Retry-After and never past the AI_TIMEOUT deadline.
+    3. A flock'ed state file shared by all xdist workers enforces, for the whole run:
+       - AI_MAX_CALLS paid calls and AI_TOKEN_BUDGET tokens (checked before every call),
+       - AI_RATE_LIMIT requests per minute (sliding window, retries included).
+       A mass failure therefore degrades to placeholders instead of hundreds of paid calls.
+    """
+
+    RATE_WINDOW_SECONDS = 60
+    MAX_BACKOFF_SECONDS = 30
+
+    logger = logging.getLogger("LLMClients")
+    _clients = {}
+    _process_usage = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(provider):
+        """Returns the cached client of the provider (created on first use)."""
+        api_key = os.getenv("GEMINI_API_KEY" if provider == "gemini" else "OPENAI_API_KEY")
+        key = (provider, api_key)
+        with LLMClients._lock:
+            client = LLMClients._clients.get(key)
+            if client is None:
+                if provider == "gemini":
+                    client = genai.Client(api_key=api_key, http_options={"timeout": int(Config.AI_TIMEOUT * 1000)})
+                else:
+                    # Retries are done here (budget + rate limit aware), not inside the SDK
+                    client = openai.OpenAI(api_key=api_key, timeout=Config.AI_TIMEOUT, max_retries=0)
+                LLMClients._clients[key] = client
+            return client
+
+    @staticmethod
+    def call(provider, request):
+        """
+        Runs 'request(client)' within the run budget and rate limit, retrying transient failures.
+        Raises AIBudgetExceeded when the budget is used up.
+        """
+        started = time.monotonic()
+        deadline = started + Config.AI_TIMEOUT
+        LLMClients._reserve_call()
+        client = LLMClients.get(provider)
+
+        attempt = 0
+        while True:
+            LLMClients._wait_for_rate_limit(deadline)
+            try:
+                response = request(client)
+                tokens = LLMClients._tokens(provider, response)
+                LLMClients._record_tokens(tokens)
+                LLMClients._record_process_usage(provider, tokens, time.monotonic() - started)
+                return response
+            except Exception as e:
+                status = LLMClients._status_code(e)
+                retryable = status == 429 or (status or 0) >= 500 or LLMClients._is_connection_error(e)
+                if not retryable or attempt >= Config.AI_RETRIES:
+                    raise
+
+                # Full jitter: workers hitting the same 429 do not retry in lockstep
+                backoff = min(LLMClients.MAX_BACKOFF_SECONDS, Config.AI_RETRY_BACKOFF * 2 ** attempt)
+                delay = LLMClients._retry_after(e) or random.uniform(0, backoff)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                attempt += 1
+                LLMClients.logger.warning(f"🔁 {provider} answered {status or type(e).__name__}, retry {attempt} in {delay:.1f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def usage() -> dict:
+        with LLMClients._state() as state:
+            return {"calls": state["calls"], "tokens": state["tokens"], "refused": state["refused"]}
+
+    @staticmethod
+    def process_usage() -> dict:
+        """{provider: {'calls', 'tokens', 'seconds'}} of successful calls made by this process."""
+        with LLMClients._lock:
+            return {provider: dict(usage) for provider, usage in LLMClients._process_usage.items()}
+
+    @staticmethod
+    def _record_process_usage(provider, tokens, seconds):
+        with LLMClients._lock:
+            usage = LLMClients._process_usage.setdefault(provider, {"calls": 0, "tokens": 0, "seconds": 0.0})
+            usage["calls"] += 1
+            usage["tokens"] += tokens
+            usage["seconds"] += seconds
+
+    # --- RUN-WIDE BUDGET ---
+    @staticmethod
+    def _reserve_call():
+        with LLMClients._state() as state:
+            over_calls = Config.AI_MAX_CALLS and state["calls"] >= Config.AI_MAX_CALLS
+            over_tokens = Config.AI_TOKEN_BUDGET and state["tokens"] >= Config.AI_TOKEN_BUDGET
+            if over_calls or over_tokens:
+                state["refused"] += 1
+                raise AIBudgetExceeded(
+                    f"AI budget exhausted ({state['calls']}/{Config.AI_MAX_CALLS or '∞'} calls, "
+                    f"{state['tokens']}/{Config.AI_TOKEN_BUDGET or '∞'} tokens). Analysis skipped."
+                )
+            state["calls"] += 1
+
+    @staticmethod
+    def _record_tokens(tokens):
+        if tokens:
+            with LLMClients._state() as state:
+                state["tokens"] += tokens
+
+    @staticmethod
+    def _wait_for_rate_limit(deadline):
+        if not Config.AI_RATE_LIMIT:
+            return
+        while True:
+            now = time.time()
+            with LLMClients._state() as state:
+                window = [t for t in state["window"] if now - t < LLMClients.RATE_WINDOW_SECONDS]
+                if len(window) < Config.AI_RATE_LIMIT:
+                    state["window"] = window + [now]
+                    return
+                state["window"] = window
+                wait = window[0] + LLMClients.RATE_WINDOW_SECONDS - now
+
+            if time.monotonic() + wait >= deadline:
+                raise AIBudgetExceeded(f"AI rate limit ({Config.AI_RATE_LIMIT}/min) reached. Analysis skipped.")
+            time.sleep(wait)
+
+    @staticmethod
+    def _state():
+        return SharedState.locked(
+            os.path.join(SharedState.run_directory("ai-budget"), "state.json"),
+            lambda: {"calls": 0, "tokens": 0, "refused": 0, "window": []},
+        )
+
+    # --- PROVIDER DETAILS ---
+    @staticmethod
+    def _tokens(provider, response) -> int:
+        try:
+            if provider == "gemini":
+                return response.usage_metadata.total_token_count or 0
+            return response.usage.total_tokens or 0
+        except AttributeError:
+            return 0
+
+    @staticmethod
+    def _status_code(error):
+        # openai: APIStatusError.status_code | google-genai: errors.APIError.code
+        for attribute in ("status_code", "code"):
+            value = getattr(error, attribute, None)
+            if isinstance(value, int):
+                return value
+        return None
+
+    @staticmethod
+    def _is_connection_error(error) -> bool:
+        # Read timeouts are not retried: the deadline is already spent
+        return openai is not None and isinstance(error, openai.APIConnectionError) and not isinstance(error, openai.APITimeoutError)
+
+    @staticmethod
+    def _retry_after(error):
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return min(float(headers.get("retry-after")), LLMClients.MAX_BACKOFF_SECONDS)
+        except (TypeError, ValueError):
+            return None
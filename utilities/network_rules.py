@@ -0,0 +1,192 @@
+import json
+import fnmatch
+import logging
+from urllib.parse import quote
+from typing import Any, Iterable
+
+class NetworkRules:
+    """
+    [ARCHITECTURE: Declarative Request Blocking]
+    1. Rules are URL wildcard patterns ('*' = anything). The token 'third_party' expands to THIRD_PARTY.
+    2. Sources (merged): Config (NETWORK_BLOCK / NETWORK_ALLOW) -> test marker -> page object.
+    3. Allow wins: A block pattern covered by an allow pattern is dropped.
+    4. Chrome (Local & Selenoid): CDP 'Network.setBlockedURLs' (HTTP 'goog/cdp/execute', no websocket needed).
+    5. Firefox: No CDP over WebDriver, so Config rules are compiled into a PAC script at session start.
+    """
+
+    # Analytics, chat widgets and trackers that dominate page-load time.
+    THIRD_PARTY = [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*googleadservices.com*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*clarity.ms*",
+        "*snap.licdn.com*",
+        "*px.ads.linkedin.com*",
+        "*bat.bing.com*",
+        "*analytics.tiktok.com*",
+        "*static.ads-twitter.com*",
+        "*widget.intercom.io*",
+        "*js.intercomcdn.com*",
+        "*js.driftt.com*",
+        "*js.hs-scripts.com*",
+        "*js.hs-analytics.net*",
+        "*static.zdassets.com*",
+        "*cdn.segment.com*",
+    ]
+
+    # Blocked requests are sent to a closed local port (PAC fallback for Firefox).
+    PAC_BLACKHOLE = "PROXY 127.0.0.1:9"
+
+    logger = logging.getLogger("NetworkRules")
+
+    @staticmethod
+    def is_enabled(config: Any) -> bool:
+        return bool(getattr(config, "NETWORK_RULES", False))
+
+    @staticmethod
+    def expand(patterns: Iterable[str]) -> list:
+        expanded = []
+        for pattern in patterns or ():
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if pattern == "third_party":
+                expanded.extend(NetworkRules.THIRD_PARTY)
+            else:
+                expanded.append(pattern)
+        return expanded
+
+    @staticmethod
+    def resolve(block: Iterable[str], allow: Iterable[str]) -> list:
+        """Returns the final block list (sorted, unique) after applying allow patterns."""
+        allow = NetworkRules.expand(allow)
+        result = set()
+        for pattern in NetworkRules.expand(block):
+            if any(fnmatch.fnmatchcase(pattern, a) for a in allow):
+                continue
+            result.add(pattern)
+        return sorted(result)
+
+    @staticmethod
+    def session_rules(config: Any):
+        """(block, allow) lists defined for the whole run."""
+        return list(getattr(config, "NETWORK_BLOCK", [])), list(getattr(config, "NETWORK_ALLOW", []))
+
+    # =========================================================================
+    # SESSION CREATION (Firefox fallback)
+    # =========================================================================
+    @staticmethod
+    def pac_url(block: Iterable[str], allow: Iterable[str]) -> str:
+        """Builds a 'data:' PAC script URL. shExpMatch uses the same '*' wildcard syntax as CDP."""
+        allow_checks = " || ".join(f"shExpMatch(url, {json.dumps(p)})" for p in NetworkRules.expand(allow)) or "false"
+        block_checks = " || ".join(f"shExpMatch(url, {json.dumps(p)})" for p in NetworkRules.resolve(block, allow)) or "false"
+        script = (
+            "function FindProxyForURL(url, host) {"
+            f" if ({allow_checks}) return 'DIRECT';"
+            f" if ({block_checks}) return '{NetworkRules.PAC_BLACKHOLE}';"
+            " return 'DIRECT'; }"
+        )
+        return "data:application/x-ns-proxy-autoconfig," + quote(script)
+
+    # =========================================================================
+    # RUNTIME (per test / per page object)
+    # =========================================================================
+    @staticmethod
+    def set_test_rules(driver, block=(), allow=()):
+        """Stores rules coming from the 'network_rules' marker; they stay active for the whole test."""
+        driver.network_test_rules = (list(block), list(allow))
+
+    @staticmethod
+    def apply(driver, config: Any, block=(), allow=()):
+        """
+        Applies Config + test + page object rules to the session.
+        Skips the round trip if the resulting block list did not change.
+        """
+        if not NetworkRules.is_enabled(config) or driver is None:
+            return
+
+        session_block, session_allow = NetworkRules.session_rules(config)
+        test_block, test_allow = getattr(driver, "network_test_rules", ((), ()))
+        patterns = NetworkRules.resolve(
+            [*session_block, *test_block, *block],
+            [*session_allow, *test_allow, *allow],
+        )
+
+        if patterns == getattr(driver, "network_blocked_urls", []):
+            return
+
+        browser = driver.capabilities.get("browserName", "").lower()
+        if browser == "firefox":
+            # PAC was fixed at session start; runtime rules cannot be changed without CDP.
+            NetworkRules.logger.warning("⚠️ Firefox: Only NETWORK_BLOCK/NETWORK_ALLOW rules (PAC) are active, page/test rules skipped.")
+            driver.network_blocked_urls = patterns
+            return
+
+        try:
+            if not getattr(driver, "network_cdp_enabled", False):
+                NetworkRules._cdp(driver, "Network.enable", {})
+                driver.network_cdp_enabled = True
+            NetworkRules._cdp(driver, "Network.setBlockedURLs", {"urls": patterns})
+            driver.network_blocked_urls = patterns
+            NetworkRules.logger.info(f"🚫 Blocking {len(patterns)} URL pattern(s).")
+        except Exception as e:
+            NetworkRules.logger.warning(f"Network Rules could not be applied: {e}")
+
+    @staticmethod
+    def clear(driver):
+        """Removes runtime rules (called before a session is handed to another test)."""
+        driver.network_test_rules = ((), ())
+        if not getattr(driver, "network_cdp_enabled", False):
+            driver.network_blocked_urls = []
+            return
+        try:
+            NetworkRules._cdp(driver, "Network.setBlockedURLs", {"urls": []})
+        except Exception as e:
+            NetworkRules.logger.warning(f"Network Rules could not be cleared: {e}")
+        driver.network_blocked_urls = []
+
+    @staticmethod
+    def collect_stats(driver) -> dict:
+        """
+        Blocked vs allowed request counts since the last call (per test).
+        Chrome: Performance log (requires NETWORK_RULES, see DriverFactory).
+        Firefox: Only allowed requests of the current page are visible (Resource Timing).
+        """
+        stats = {"blocked": None, "allowed": None, "patterns": len(getattr(driver, "network_blocked_urls", []))}
+        browser = driver.capabilities.get("browserName", "").lower()
+
+        try:
+            if browser == "firefox":
+                stats["allowed"] = driver.execute_script("return performance.getEntriesByType('resource').length + 1;")
+            else:
+                total = 0
+                blocked = 0
+                for entry in driver.get_log("performance"):
+                    message = json.loads(entry["message"])["message"]
+                    if message["method"] == "Network.requestWillBeSent":
+                        total += 1
+                    elif message["method"] == "Network.loadingFailed" and message["params"].get("blockedReason"):
+                        blocked += 1
+                stats["blocked"] = blocked
+                stats["allowed"] = total - blocked
+        except Exception as e:
+            NetworkRules.logger.warning(f"Network Stats could not be collected: {e}")
+            return stats
+
+        # Per-session totals (a reused session serves several tests)
+        session_totals = getattr(driver, "network_stats", {"blocked": 0, "allowed": 0})
+        for key in ("blocked", "allowed"):
+            session_totals[key] += stats[key] or 0
+        driver.network_stats = session_totals
+        stats["session"] = dict(session_totals)
+        return stats
+
+    @staticmethod
+    def _cdp(driver, cmd: str, params: dict):
+        # Local Chrome has a helper; Remote (Selenoid) uses the same vendor endpoint directly.
+        if hasattr(driver, "execute_cdp_cmd"):
+            return driver.execute_cdp_cmd(cmd, params)
+        return driver.execute("executeCdpCommand", {"cmd": cmd, "params": params})["value"]
@@ -1,94 +1,131 @@
+import re
+import html
+import threading
 import markdown
 
+# Shared by every AI attachment, scoped to .ai-report-box (no side effects on the Allure page).
+REPORT_CSS = """
+.ai-report-box {
+    font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif;
+    background-color: #f8f9fa;
+    border: 1px solid #e9ecef;
+    border-left: 5px solid #dc3545; /* Error Red */
+    border-radius: 6px;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.05);
+    margin: 10px 0;
+    overflow: hidden;
+}
+.ai-header {
+    background-color: #fff;
+    padding: 12px 20px;
+    border-bottom: 1px solid #e9ecef;
+    display: flex;
+    align-items: center;
+    gap: 10px;
+}
+.ai-icon { font-size: 20px; }
+.ai-title {
+    color: #dc3545;
+    font-weight: 700;
+    font-size: 16px;
+    margin: 0;
+}
+.ai-badge {
+    background-color: #e2e6ea;
+    color: #495057;
+    font-size: 11px;
+    padding: 3px 8px;
+    border-radius: 10px;
+    font-weight: 600;
+    text-transform: uppercase;
+}
+.ai-content {
+    padding: 20px;
+    color: #212529;
+    line-height: 1.6;
+    font-size: 14px;
+}
+/* Code Blocks */
+.ai-report-box pre {
+    background: #2b2b2b;
+    color: #f8f8f2;
+    padding: 15px;
+    border-radius: 4px;
+    overflow-x: auto;
+    font-family: 'Consolas', 'Monaco', monospace;
+}
+.ai-report-box code {
+    font-family: 'Consolas', 'Monaco', monospace;
+    background-color: #e9ecef;
+    padding: 2px 4px;
+    border-radius: 3px;
+    color: #c7254e;
+}
+.ai-report-box pre code {
+    background-color: transparent;
+    color: inherit;
+    padding: 0;
+}
+.ai-report-box ul { padding-left: 20px; margin: 0; }
+.ai-report-box li { margin-bottom: 8px; }
+"""
+
+# Minified once at import: attachments are standalone files (Allure renames them in the report,
+# so they cannot link a shared stylesheet) and carry this compact inline copy.
+REPORT_STYLE = re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"/\*.*?\*/|\s+", " ", REPORT_CSS)).strip()
+
 class ReportHelper:
+    """
+    [ARCHITECTURE: Lean HTML Attachments]
+    1. The stylesheet is minified once (REPORT_STYLE); each attachment carries it plus its compact
+       body HTML, so it renders the same in allure serve, local and CI reports without extra assets.
+       Attachments are named by content hash, so identical reports are written once.
+    2. One Markdown pipeline per thread, reset between documents (no per-call extension setup).
+    3. convert_many() renders a batch in one pass; identical (markdown, model) pairs are rendered once.
+    """
+
+    EXTENSIONS = ['fenced_code', 'nl2br', 'sane_lists']
+    AI_TITLE = "Artificial Intelligence Error Analysis"
+    AI_ICON = "🤖"
+
+    _local = threading.local()
+
     @staticmethod
-    def convert_to_html(markdown_text, model_name):
+    def convert_to_html(markdown_text, model_name, title=AI_TITLE, icon=AI_ICON):
         """
-        Takes Markdown text and wraps it in a stylish HTML template.
+        Takes Markdown text and wraps it in the report template (minified stylesheet inlined).
+        title/icon: header of the box (defaults to the AI analysis header).
         """
-        # 1. Markdown -> Pure HTML Conversion
-        raw_html = markdown.markdown(
-            markdown_text,
-            extensions=['fenced_code', 'nl2br', 'sane_lists']
-        )
+        return ReportHelper.convert_many([(markdown_text, model_name)], title=title, icon=icon)[0]
 
-        # 2. HTML Template (CSS + Structure)
-        # This part is isolated from logic, so you can style it as you wish.
-        template = f"""
-        <style>
-            .ai-report-box {{
-                font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif;
-                background-color: #f8f9fa;
-                border: 1px solid #e9ecef;
-                border-left: 5px solid #dc3545; /* Error Red */
-                border-radius: 6px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-                margin: 10px 0;
-                overflow: hidden;
-            }}
-            .ai-header {{
-                background-color: #fff;
-                padding: 12px 20px;
-                border-bottom: 1px solid #e9ecef;
-                display: flex;
-                align-items: center;
-                gap: 10px;
-            }}
-            .ai-title {{
-                color: #dc3545;
-                font-weight: 700;
-                font-size: 16px;
-                margin: 0;
-            }}
-            .ai-badge {{
-                background-color: #e2e6ea;
-                color: #495057;
-                font-size: 11px;
-                padding: 3px 8px;
-                border-radius: 10px;
-                font-weight: 600;
-                text-transform: uppercase;
-            }}
-            .ai-content {{
-                padding: 20px;
-                color: #212529;
-                line-height: 1.6;
-                font-size: 14px;
-            }}
-            /* Code Blocks */
-            pre {{
-                background: #2b2b2b;
-                color: #f8f8f2;
-                padding: 15px;
-                border-radius: 4px;
-                overflow-x: auto;
-                font-family: 'Consolas', 'Monaco', monospace;
-            }}
-            code {{
-                font-family: 'Consolas', 'Monaco', monospace;
-                background-color: #e9ecef;
-                padding: 2px 4px;
-                border-radius: 3px;
-                color: #c7254e;
-            }}
-            pre code {{
-                background-color: transparent;
-                color: inherit;
-                padding: 0;
-            }}
-            ul {{ padding-left: 20px; margin: 0; }}
-            li {{ margin-bottom: 8px; }}
-        </style>
-        
-        <div class="ai-report-box">
-            <div class="ai-header">
-                <span style="font-size: 20px;">🤖</span>
-                <h3 class="ai-title">Artificial Intelligence Error Analysis</h3>
-                <span class="ai-badge">{model_name}</span>
-            </div>
-            <div class="ai-content">
-                {raw_html}
-            </div>
-        </div>
-        """
-        return template
\ No newline at end of file
+    @staticmethod
+    def convert_many(reports, title=AI_TITLE, icon=AI_ICON) -> list:
+        """[(markdown_text, model_name), ...] -> [html, ...] in the same order, all under the same header."""
+        rendered = {}
+        pages = []
+        for markdown_text, model_name in reports:
+            key = (markdown_text, model_name)
+            if key not in rendered:
+                rendered[key] = ReportHelper._wrap(ReportHelper._render(markdown_text), model_name, title, icon)
+            pages.append(rendered[key])
+        return pages
+
+    @staticmethod
+    def _render(markdown_text) -> str:
+        converter = getattr(ReportHelper._local, "markdown", None)
+        if converter is None:
+            converter = ReportHelper._local.markdown = markdown.Markdown(extensions=ReportHelper.EXTENSIONS)
+        try:
+            return converter.convert(markdown_text or "")
+        finally:
+            converter.reset()
+
+    @staticmethod
+    def _wrap(raw_html, model_name, title=AI_TITLE, icon=AI_ICON) -> str:
+        return (
+            f'<meta charset="utf-8"><style>{REPORT_STYLE}</style>'
+            f'<div class="ai-report-box"><div class="ai-header"><span class="ai-icon">{icon}</span>'
+            f'<h3 class="ai-title">{html.escape(title)}</h3>'
+            f'<span class="ai-badge">{html.escape(str(model_name))}</span></div>'
+            f'<div class="ai-content">{raw_html}</div></div>'
+        )
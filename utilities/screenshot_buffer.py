@@ -0,0 +1,64 @@
+import logging
+from collections import deque
+import allure
+from allure_commons.types import AttachmentType
+from config import Config
+from utilities.screenshot_pipeline import ScreenshotPipeline
+
+class ScreenshotBuffer:
+    """
+    [ARCHITECTURE: Screenshot Policy (SCREENSHOT_POLICY)]
+    1. 'always'    : Every step is captured and attached immediately (original behaviour).
+    2. 'last_n'    : Steps are captured into a bounded in-memory ring buffer (no disk I/O).
+                     The last N frames reach Allure only when the test fails.
+    3. 'on_failure': No capture round trip at all during the test. Only the last N step names
+                     are kept; on failure they are attached as a trail next to the Error_Screenshot.
+    The buffer lives on the driver, so every page object of a test shares it.
+    """
+
+    logger = logging.getLogger("ScreenshotBuffer")
+
+    @staticmethod
+    def capture(driver, name):
+        policy = Config.SCREENSHOT_POLICY
+
+        if policy == "on_failure":
+            ScreenshotBuffer._buffer(driver).append((name, None))
+            return
+
+        png = driver.get_screenshot_as_png()
+        if policy == "last_n":
+            ScreenshotBuffer._buffer(driver).append((name, png))
+            return
+
+        ScreenshotPipeline.attach(png, name)
+
+    @staticmethod
+    def flush(driver):
+        """Attaches buffered frames (called from the makereport hook when a test fails)."""
+        frames = ScreenshotBuffer._buffer(driver)
+        if not frames:
+            return
+
+        trail = []
+        for index, (name, png) in enumerate(frames, start=1):
+            trail.append(f"{index}. {name}")
+            if png is not None:
+                ScreenshotPipeline.attach(png, f"[Last {len(frames)}] {name}")
+
+        allure.attach("\n".join(trail), name="Last Steps Before Failure", attachment_type=AttachmentType.TEXT)
+        ScreenshotBuffer.logger.info(f"📸 Flushed {len(frames)} buffered step(s) to report.")
+        frames.clear()
+
+    @staticmethod
+    def clear(driver):
+        """Drops frames of the previous test (reused sessions)."""
+        ScreenshotBuffer._buffer(driver).clear()
+
+    @staticmethod
+    def _buffer(driver) -> deque:
+        buffer = getattr(driver, "screenshot_buffer", None)
+        if buffer is None:
+            buffer = deque(maxlen=max(1, Config.SCREENSHOT_BUFFER_SIZE))
+            driver.screenshot_buffer = buffer
+        return buffer
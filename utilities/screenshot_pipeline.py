@@ -0,0 +1,138 @@
+import logging
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import allure
+from allure_commons.types import AttachmentType
+from config import Config
+
+# Make dependency optional (without Pillow, screenshots are attached as original PNGs)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+class ScreenshotPipeline:
+    """
+    [ARCHITECTURE: Off-Thread Attachment Pipeline]
+    1. The test thread only hands the raw PNG over (no encoding cost on the test thread).
+    2. A single worker thread (keeps capture order) drops frames whose perceptual hash (dHash)
+       matches the previous frame, downscales to SCREENSHOT_MAX_WIDTH and re-encodes (WebP/JPEG).
+    3. Results are attached to Allure from the test thread when the test call ends (drain),
+       because Allure binds attachments to the caller thread's current test.
+    """
+
+    FORMATS = {
+        "webp": ("WEBP", "image/webp", "webp"),
+        "jpeg": ("JPEG", "image/jpeg", "jpg"),
+        "png": ("PNG", "image/png", "png"),
+    }
+    HASH_SIZE = 16  # 16x16 = 256-bit dHash
+
+    logger = logging.getLogger("ScreenshotPipeline")
+    _executor = None
+    _pending = []
+    _last_hash = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_active() -> bool:
+        if Image is None:
+            return False
+        return Config.SCREENSHOT_FORMAT != "png" or Config.SCREENSHOT_MAX_WIDTH > 0 or Config.SCREENSHOT_DEDUPE
+
+    @staticmethod
+    def attach(png, name):
+        """Attaches immediately (pipeline off) or queues the frame for background processing."""
+        if not ScreenshotPipeline.is_active():
+            allure.attach(png, name=name, attachment_type=AttachmentType.PNG)
+            return
+
+        future = ScreenshotPipeline._get_executor().submit(ScreenshotPipeline._process, png, name)
+        with ScreenshotPipeline._lock:
+            ScreenshotPipeline._pending.append((future, png, name))
+
+    @staticmethod
+    def drain():
+        """Waits for queued frames and attaches them in capture order (test thread)."""
+        with ScreenshotPipeline._lock:
+            pending, ScreenshotPipeline._pending = ScreenshotPipeline._pending, []
+
+        dropped = 0
+        for future, png, name in pending:
+            try:
+                result = future.result()
+            except Exception as e:
+                ScreenshotPipeline.logger.warning(f"Screenshot Encode Error ({name}): {e}")
+                allure.attach(png, name=name, attachment_type=AttachmentType.PNG)
+                continue
+
+            if result is None:
+                dropped += 1
+                continue
+            body, mime_type, extension = result
+            allure.attach(body, name=name, attachment_type=mime_type, extension=extension)
+
+        if dropped:
+            ScreenshotPipeline.logger.info(f"🖼️ Dropped {dropped} duplicate frame(s).")
+
+    @staticmethod
+    def reset():
+        """Starts a new test: the first frame is never a duplicate."""
+        if not ScreenshotPipeline.is_active():
+            return
+        # Runs on the worker thread, so it stays ordered with the frames already queued.
+        ScreenshotPipeline._get_executor().submit(ScreenshotPipeline._set_last_hash, None)
+
+    @staticmethod
+    def _get_executor():
+        with ScreenshotPipeline._lock:
+            if ScreenshotPipeline._executor is None:
+                ScreenshotPipeline._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot")
+            return ScreenshotPipeline._executor
+
+    @staticmethod
+    def _set_last_hash(value):
+        ScreenshotPipeline._last_hash = value
+
+    @staticmethod
+    def _process(png, name):
+        image = Image.open(BytesIO(png))
+        image.load()
+
+        if Config.SCREENSHOT_DEDUPE:
+            frame_hash = ScreenshotPipeline._dhash(image)
+            previous = ScreenshotPipeline._last_hash
+            ScreenshotPipeline._last_hash = frame_hash
+            if previous is not None and bin(frame_hash ^ previous).count("1") <= Config.SCREENSHOT_DEDUPE_DISTANCE:
+                return None
+
+        max_width = Config.SCREENSHOT_MAX_WIDTH
+        if max_width and image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.BILINEAR)
+
+        pil_format, mime_type, extension = ScreenshotPipeline.FORMATS.get(
+            Config.SCREENSHOT_FORMAT, ScreenshotPipeline.FORMATS["png"]
+        )
+        if pil_format == "JPEG":
+            image = image.convert("RGB")
+
+        buffer = BytesIO()
+        if pil_format == "PNG":
+            image.save(buffer, format=pil_format, optimize=True)
+        else:
+            image.save(buffer, format=pil_format, quality=Config.SCREENSHOT_QUALITY)
+        return buffer.getvalue(), mime_type, extension
+
+    @staticmethod
+    def _dhash(image) -> int:
+        """Difference hash: compares neighbouring pixels of a tiny grayscale thumbnail."""
+        size = ScreenshotPipeline.HASH_SIZE
+        pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+        value = 0
+        for row in range(size):
+            offset = row * (size + 1)
+            for col in range(size):
+                value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        return value
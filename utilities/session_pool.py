@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+from selenium.webdriver.remote.webdriver import WebDriver
+from utilities.capacity_planner import ConcurrencyController
+from utilities.driver_factory import DriverFactory
+from utilities.network_rules import NetworkRules
+from utilities.video_manager import VideoManager
+
+# Logger Definition
+logger = logging.getLogger("SessionPool")
+
+class SessionPool:
+    """
+    [ARCHITECTURE: Per-Worker Warm Session Pool]
+    Every xdist worker is a separate process, so one pool instance == one pool per worker.
+    1. 'fresh' mode: A new Selenoid session for every test (video-per-test).
+    2. 'reuse' mode: The session is reset (cookies, storage, extra windows, about:blank)
+       and handed to the next test on the same worker.
+    3. A session is recycled after SESSION_MAX_USES tests or after any failure.
+    4. 'prefetch' (optional): The next session is created in the background while the current
+       test runs, and quit/manifest writes run on the same background executor.
+       A spare is health-checked before use (it may outlive Selenoid's idle '-timeout', see docker-compose.yml).
+    5. CAPACITY_CONTROL: Every session (spares included) holds a concurrency slot from creation
+       until quit, and every session creation reports its latency to the shared ConcurrencyController.
+    """
+
+    def __init__(self, config: Any):
+        self.config = config
+        self.mode = getattr(config, "SESSION_MODE", "fresh").lower()
+        self.max_uses = max(1, int(getattr(config, "SESSION_MAX_USES", 1)))
+        self.prefetch = bool(getattr(config, "SESSION_PREFETCH", False))
+        self.capacity_control = ConcurrencyController.is_enabled(config)
+        self._idle: Optional[WebDriver] = None
+        self._spare: Optional[Future] = None
+        self._lock = threading.Lock()
+        # 2 threads: one creates the next session while the other tears down the previous one
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-pool") if self.prefetch else None
+
+        logger.info(f"Session Pool ready. Mode: {self.mode.upper()} | Max Uses: {self.max_uses} | Prefetch: {self.prefetch}")
+
+    def acquire(self, fresh: bool = False) -> WebDriver:
+        """
+        Returns a ready driver.
+        fresh: Forces a brand-new session (e.g. tests that need their own video).
+        """
+        if fresh or self.mode != "reuse":
+            driver = self._take_spare() or self._create()
+            # In fresh mode every test needs a new session, so start building the next one now.
+            if self.mode != "reuse":
+                self._start_prefetch()
+            return driver
+
+        with self._lock:
+            driver, self._idle = self._idle, None
+
+        if driver is None:
+            driver = self._take_spare() or self._create()
+        else:
+            driver.pool_uses += 1
+            logger.info(f"♻️ Reusing warm session: {driver.session_id} (Use {driver.pool_uses}/{self.max_uses})")
+
+        # Last use of this session: the next test will need a new one.
+        if driver.pool_uses >= self.max_uses:
+            self._start_prefetch()
+        return driver
+
+    def release(self, driver: WebDriver, failed: bool = False, fresh: bool = False):
+        """
+        Gives the driver back to the pool. Sessions that cannot be reused are quit.
+        """
+        reusable = (
+            self.mode == "reuse"
+            and not fresh
+            and not failed
+            and driver.pool_uses < self.max_uses
+        )
+
+        if reusable and self._reset(driver):
+            with self._lock:
+                if self._idle is None:
+                    self._idle = driver
+                    return
+
+        if self.mode == "reuse" and not fresh:
+            # Unplanned recycle (failure / unhealthy session): replace it in the background.
+            self._start_prefetch()
+        self.defer(self._retire, driver)
+
+    def defer(self, fn, *args):
+        """Runs teardown work on the background executor (prefetch mode) or inline."""
+        if self._executor is None:
+            fn(*args)
+            return
+        self._executor.submit(self._run_safely, fn, *args)
+
+    def shutdown(self):
+        """Quits the idle and spare sessions and waits for pending teardown work."""
+        with self._lock:
+            driver, self._idle = self._idle, None
+        if driver is not None:
+            self._retire(driver)
+
+        spare = self._take_spare()
+        if spare is not None:
+            self._retire(spare)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _start_prefetch(self):
+        if self._executor is None:
+            return
+        with self._lock:
+            if self._spare is None:
+                logger.info("⏩ Prefetching next session in background...")
+                self._spare = self._executor.submit(self._create)
+
+    def _take_spare(self) -> Optional[WebDriver]:
+        with self._lock:
+            spare, self._spare = self._spare, None
+        if spare is None:
+            return None
+        try:
+            driver = spare.result()
+        except Exception as e:
+            # Fall back to a synchronous creation so the error surfaces in the test setup.
+            logger.warning(f"⚠️ Prefetched session could not be created: {e}")
+            return None
+
+        # The spare idled for a whole test: Selenoid may have closed it (-timeout)
+        try:
+            driver.current_url
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetched session expired while idle, creating a new one: {e}")
+            self.defer(self._retire, driver)
+            return None
+        return driver
+
+    @staticmethod
+    def _run_safely(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"Background Teardown Error: {e}")
+
+    def _create(self) -> WebDriver:
+        # Unique ID for each session (Selenoid label)
+        execution_id = str(uuid.uuid4())
+        # Raises CapacityTimeout instead of adding a browser to an overloaded host
+        slot = ConcurrencyController.acquire_slot() if self.capacity_control else None
+        start = time.monotonic()
+        try:
+            driver = DriverFactory.get_driver(self.config, execution_id)
+        except Exception:
+            ConcurrencyController.release_slot(slot)
+            raise
+        if self.capacity_control:
+            ConcurrencyController.report_latency(time.monotonic() - start)
+
+        driver.capacity_slot = slot
+        driver.execution_id = execution_id
+        driver.pool_uses = 1
+        driver.container_id = None
+
+        # Find container ID using UUID Label (while the container is guaranteed to be alive)
+        if getattr(driver, "video_name", None):
+            driver.container_id = VideoManager.get_container_id_by_uuid(execution_id)
+            if driver.container_id:
+                logger.info(f"✅ Container Found (UUID): {driver.container_id[:12]}")
+            else:
+                logger.warning(f"⚠️ Container could not be found by UUID! ExecID: {execution_id}")
+
+        return driver
+
+    @staticmethod
+    def _reset(driver: WebDriver) -> bool:
+        """
+        Brings the session back to a clean state. Returns False if the session is not healthy.
+        """
+        try:
+            NetworkRules.clear(driver)
+
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            driver.delete_all_cookies()
+            # Storage is per-origin, so it must be cleared before leaving the page.
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Session reset failed, recycling it: {e}")
+            return False
+
+    @staticmethod
+    def _retire(driver: WebDriver):
+        try:
+            driver.quit()
+            logger.info(f"🗑️ Session closed: {driver.session_id}")
+        except Exception as e:
+            logger.warning(f"Session Quit Error: {e}")
+        finally:
+            ConcurrencyController.release_slot(getattr(driver, "capacity_slot", None))
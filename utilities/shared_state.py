@@ -0,0 +1,40 @@
+import os
+import json
+import fcntl
+import tempfile
+from contextlib import contextmanager
+
+class SharedState:
+    """
+    flock'ed JSON state shared by all xdist workers of one run.
+    The directory is keyed by the xdist run ID (or the process ID without xdist),
+    so nothing leaks into the next run.
+    """
+
+    @staticmethod
+    def run_directory(name) -> str:
+        run_id = os.getenv("PYTEST_XDIST_TESTRUNUID") or f"pid-{os.getpid()}"
+        directory = os.path.join(tempfile.gettempdir(), f"{name}-{run_id}")
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @staticmethod
+    @contextmanager
+    def locked(path, default):
+        """
+        Read-modify-write under an exclusive lock. 'default()' initializes a missing/corrupt state.
+        The state is written back even if the block raises (e.g. a refusal counter).
+        """
+        with open(path, "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.seek(0)
+            try:
+                state = json.loads(handle.read())
+            except ValueError:
+                state = default()
+            try:
+                yield state
+            finally:
+                handle.seek(0)
+                handle.truncate()
+                json.dump(state, handle)
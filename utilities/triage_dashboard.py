@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import logging
+import tempfile
+from config import Config
+from utilities.shared_state import SharedState
+
+# Static viewer, written once. Data is loaded as <script> files (works from file:// and any static host):
+# index.js = aggregates (rewritten per entry, size ~ unique groups), page-NNNNN.js = appended entries.
+TRIAGE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>AI Failure Triage</title>
+<style>
+body { font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; margin: 20px; color: #212529; background: #f8f9fa; }
+h1 { color: #dc3545; font-size: 22px; } h2 { font-size: 16px; margin-top: 24px; }
+.grid { display: flex; flex-wrap: wrap; gap: 16px; }
+table { border-collapse: collapse; background: #fff; font-size: 13px; }
+th, td { border: 1px solid #e9ecef; padding: 4px 8px; text-align: left; vertical-align: top; }
+th { background: #e2e6ea; } tr.active td { background: #fff3cd; }
+td.count { text-align: right; } tr.group { cursor: pointer; }
+code { color: #c7254e; } .muted { color: #6c757d; } button { margin: 0 4px; }
+</style></head>
+<body>
+<h1>🤖 AI Failure Triage</h1>
+<div id="totals" class="muted"></div>
+<h2>Providers</h2><table id="providers"></table>
+<div class="grid">
+  <div><h2>By page object</h2><table id="page_object"></table></div>
+  <div><h2>By locator</h2><table id="locator"></table></div>
+  <div><h2>By cluster</h2><table id="cluster"></table></div>
+</div>
+<h2>Failures <span id="filter" class="muted"></span></h2>
+<div><button id="prev">◀</button><span id="position"></span><button id="next">▶</button></div>
+<table id="entries"></table>
+<script>
+const TOP_GROUPS = 50;
+let page = 1, filter = null;
+const pages = {};
+function TRIAGE_PAGE(number, entry) { (pages[number] = pages[number] || []).push(entry); }
+function cell(row, value, tag) {
+    const node = document.createElement(tag || 'td');
+    if (value instanceof Node) node.appendChild(value); else node.textContent = value === undefined || value === null ? '' : value;
+    row.appendChild(node);
+    return node;
+}
+function header(table, names) { const row = table.insertRow(); names.forEach(name => cell(row, name, 'th')); }
+function analysisLink(cluster) {
+    const analysis = (TRIAGE_INDEX.analyses || {})[cluster];
+    if (!analysis) return document.createTextNode('-');
+    const link = document.createElement('a');
+    link.href = analysis.source; link.target = '_blank'; link.textContent = analysis.model;
+    return link;
+}
+function renderGroups() {
+    ['page_object', 'locator', 'cluster'].forEach(kind => {
+        const table = document.getElementById(kind);
+        table.innerHTML = '';
+        header(table, kind === 'cluster' ? ['Cluster', 'Failures', 'Analysis'] : [kind.replace('_', ' '), 'Failures']);
+        Object.entries(TRIAGE_INDEX.groups[kind] || {}).sort((a, b) => b[1] - a[1]).slice(0, TOP_GROUPS).forEach(([key, count]) => {
+            const row = table.insertRow();
+            row.className = 'group' + (filter && filter.kind === kind && filter.key === key ? ' active' : '');
+            row.onclick = () => { filter = filter && filter.key === key ? null : {kind, key}; renderGroups(); renderPage(); };
+            cell(row, key || '(none)'); cell(row, count).className = 'count';
+            if (kind === 'cluster') cell(row, analysisLink(key));
+        });
+    });
+}
+function renderProviders() {
+    const table = document.getElementById('providers');
+    header(table, ['Provider / model', 'Analyses', 'Calls', 'Tokens', 'Avg seconds', 'Est. cost (USD)']);
+    Object.entries(TRIAGE_INDEX.providers || {}).forEach(([name, usage]) => {
+        const row = table.insertRow();
+        cell(row, name); cell(row, usage.analyses); cell(row, usage.calls); cell(row, usage.tokens);
+        cell(row, (usage.seconds / Math.max(usage.analyses, 1)).toFixed(2));
+        cell(row, usage.cost === null ? 'n/a' : usage.cost.toFixed(4));
+    });
+}
+function renderPage() {
+    document.getElementById('position').textContent = ` page ${page} / ${TRIAGE_INDEX.pages} `;
+    document.getElementById('filter').textContent = filter ? `(filter on this page: ${filter.kind} = ${filter.key || '(none)'})` : '';
+    const table = document.getElementById('entries');
+    table.innerHTML = '';
+    header(table, ['Time', 'Worker', 'Test', 'Page object', 'Locator', 'Error', 'Cluster', 'Analysis']);
+    (pages[page] || []).filter(entry => !filter || entry[filter.kind] === filter.key).forEach(entry => {
+        const row = table.insertRow();
+        cell(row, new Date(entry.time * 1000).toLocaleTimeString()); cell(row, entry.worker);
+        const test = document.createElement('code'); test.textContent = entry.node_id; cell(row, test);
+        cell(row, entry.page_object); cell(row, entry.locator); cell(row, entry.error);
+        cell(row, entry.cluster); cell(row, analysisLink(entry.cluster));
+    });
+}
+function load(number) {
+    page = Math.min(Math.max(number, 1), Math.max(TRIAGE_INDEX.pages, 1));
+    if (pages[page] || !TRIAGE_INDEX.pages) return renderPage();
+    // Lazy load: only the visible page is fetched
+    const script = document.createElement('script');
+    script.src = `ai_triage/page-${String(page).padStart(5, '0')}.js`;
+    script.onload = renderPage;
+    document.body.appendChild(script);
+}
+const index = document.createElement('script');
+index.src = 'ai_triage/index.js';
+index.onload = () => {
+    document.getElementById('totals').textContent =
+        `${TRIAGE_INDEX.entries} failure(s) | ${Object.keys(TRIAGE_INDEX.groups.cluster || {}).length} cluster(s) | updated ${new Date(TRIAGE_INDEX.updated * 1000).toLocaleString()}`;
+    renderProviders(); renderGroups(); load(1);
+};
+document.body.appendChild(index);
+document.getElementById('prev').onclick = () => load(page - 1);
+document.getElementById('next').onclick = () => load(page + 1);
+</script>
+</body></html>
+"""
+
+class TriageDashboard:
+    """
+    [ARCHITECTURE: Incremental AI Triage Page (allure-results/ai-triage.html)]
+    1. Every worker appends each failure as one line to the current page file as it happens
+       (AIAnalysisQueue.submit), and each finished analysis updates its cluster (AIAnalysisQueue._analyze).
+       Nothing is ever re-read: the flock'ed state only holds counters per group and provider.
+    2. Aggregates (by page object, locator, cluster; timing/tokens/cost per provider) are rewritten
+       into a small index.js; entries are split into TRIAGE_PAGE_SIZE pages that the page lazy-loads.
+    3. The viewer itself is static HTML written once, so it opens instantly with thousands of failures.
+    """
+
+    FILE_NAME = "ai-triage.html"
+    DATA_DIR = "ai_triage"
+
+    logger = logging.getLogger("TriageDashboard")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return Config.TRIAGE_DASHBOARD
+
+    @staticmethod
+    def add_failure(node_id, failure, page_object, error_extract):
+        """Appends one failure row (called on the worker, right after the test failed)."""
+        if not TriageDashboard.is_enabled():
+            return
+        lines = [line.strip() for line in (error_extract or "").splitlines() if line.strip()]
+        error_lines = [line[1:].strip() for line in lines if line.startswith("E ")] or lines or [""]
+        entry = {
+            "time": round(time.time(), 3),
+            "worker": os.getenv("PYTEST_XDIST_WORKER", "master"),
+            "node_id": node_id,
+            "page_object": page_object,
+            "locator": failure["locator"],
+            "cluster": failure["cluster"],
+            "error": error_lines[0][:200],
+        }
+        try:
+            with TriageDashboard._state() as state:
+                page = state["entries"] // Config.TRIAGE_PAGE_SIZE + 1
+                with open(TriageDashboard._page_path(page), "a", encoding="utf-8") as f:
+                    f.write(f"TRIAGE_PAGE({page}, {json.dumps(entry)});\n")
+                state["entries"] += 1
+                state["pages"] = page
+                for kind in ("page_object", "locator", "cluster"):
+                    groups = state["groups"][kind]
+                    groups[entry[kind]] = groups.get(entry[kind], 0) + 1
+                TriageDashboard._write_index(state)
+        except Exception as e:
+            TriageDashboard.logger.warning(f"Triage Dashboard Error: {e}")
+
+    @staticmethod
+    def add_analysis(cluster, source, model_name, usage, seconds):
+        """
+        Links a cluster's analysis and adds its cost.
+        usage: {provider: {'calls', 'tokens', 'seconds'}} of this analysis ({} = no model call).
+        """
+        if not TriageDashboard.is_enabled():
+            return
+        try:
+            with TriageDashboard._state() as state:
+                state["analyses"][cluster] = {"source": source, "model": model_name, "seconds": round(seconds, 2)}
+                # Rule engine / cache hits have no provider call: listed under their model name
+                for provider, provider_usage in (usage or {model_name: {"calls": 0, "tokens": 0, "seconds": seconds}}).items():
+                    totals = state["providers"].setdefault(provider, {"analyses": 0, "calls": 0, "tokens": 0, "seconds": 0.0, "cost": None})
+                    totals["analyses"] += 1
+                    totals["calls"] += provider_usage["calls"]
+                    totals["tokens"] += provider_usage["tokens"]
+                    totals["seconds"] = round(totals["seconds"] + provider_usage["seconds"], 3)
+                    price = TriageDashboard._prices().get(provider)
+                    if price is not None:
+                        totals["cost"] = round(totals["tokens"] / 1000 * price, 6)
+                TriageDashboard._write_index(state)
+        except Exception as e:
+            TriageDashboard.logger.warning(f"Triage Dashboard Error: {e}")
+
+    @staticmethod
+    def _state():
+        directory = os.path.join(Config.ALLURE_RESULTS_DIR, TriageDashboard.DATA_DIR)
+        os.makedirs(directory, exist_ok=True)
+        TriageDashboard._write_viewer()
+        return SharedState.locked(
+            os.path.join(directory, "state.json"),
+            lambda: {"entries": 0, "pages": 0, "groups": {"page_object": {}, "locator": {}, "cluster": {}},
+                     "providers": {}, "analyses": {}},
+        )
+
+    @staticmethod
+    def _page_path(page) -> str:
+        return os.path.join(Config.ALLURE_RESULTS_DIR, TriageDashboard.DATA_DIR, f"page-{page:05d}.js")
+
+    @staticmethod
+    def _write_index(state):
+        state["updated"] = round(time.time(), 3)
+        TriageDashboard._atomic_write(
+            os.path.join(Config.ALLURE_RESULTS_DIR, TriageDashboard.DATA_DIR, "index.js"),
+            f"window.TRIAGE_INDEX = {json.dumps(state)};\n",
+        )
+
+    @staticmethod
+    def _write_viewer():
+        path = os.path.join(Config.ALLURE_RESULTS_DIR, TriageDashboard.FILE_NAME)
+        if not os.path.exists(path):
+            TriageDashboard._atomic_write(path, TRIAGE_HTML)
+
+    @staticmethod
+    def _atomic_write(path, content):
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _prices() -> dict:
+        """AI_TOKEN_PRICES='gemini=0.0005,openai=0.005' -> USD per 1K tokens."""
+        prices = {}
+        for item in Config.AI_TOKEN_PRICES.split(","):
+            name, _, value = item.partition("=")
+            try:
+                prices[name.strip()] = float(value)
+            except ValueError:
+                continue
+        return prices
@@ -1,10 +1,12 @@
 import os
 import json
+import time
 import fcntl
 import glob
 import logging
+import tempfile
 import docker
-from docker.errors import NotFound
+from config import Config
 
 class VideoManager:
     """
@@ -12,12 +14,16 @@ class VideoManager:
     1. No Time/Sleep.
     2. No API/Request polling.
     3. Waits for Docker 'destroy' event instead of just Process Exit.
-    This guarantees that code execution is blocked 100% until Selenoid cleanup is complete.
+    4. One shared event subscription for all containers, bounded by VIDEO_CLEANUP_TIMEOUT.
+    This guarantees that code execution is blocked until Selenoid cleanup is complete
+    (or reports the containers that never disappeared).
+    5. Result patching: one index (fullName -> result file) per session end, one read and one
+       atomic compact write per patched file.
     """
     
-    ALLURE_RESULTS_DIR = "/app/allure-results"
-    CLEANUP_MANIFEST = os.path.join(ALLURE_RESULTS_DIR, "cleanup_manifest.jsonl")
+    CLEANUP_MANIFEST_NAME = "cleanup_manifest.jsonl"
     logger = logging.getLogger("VideoManager")
+    _result_index = None
 
     @staticmethod
     def get_container_id_by_uuid(execution_id):
@@ -33,6 +39,11 @@ class VideoManager:
             VideoManager.logger.warning(f"Docker Label Query Error: {e}")
         return None
 
+    @staticmethod
+    def _manifest_path() -> str:
+        # Resolved per call: conftest points Config.ALLURE_RESULTS_DIR at pytest's --alluredir
+        return os.path.join(Config.ALLURE_RESULTS_DIR, VideoManager.CLEANUP_MANIFEST_NAME)
+
     @staticmethod
     def log_decision(node_id, test_name, session_id, container_id, video_name, action):
         entry = {
@@ -44,7 +55,7 @@ class VideoManager:
             "action": action
         }
         try:
-            with open(VideoManager.CLEANUP_MANIFEST, "a") as f:
+            with open(VideoManager._manifest_path(), "a") as f:
                 fcntl.flock(f, fcntl.LOCK_EX)
                 f.write(json.dumps(entry) + "\n")
                 fcntl.flock(f, fcntl.LOCK_UN)
@@ -62,84 +73,165 @@ class VideoManager:
         return False
 
     @staticmethod
-    def inject_video(node_id, video_filename):
-        json_files = glob.glob(os.path.join(VideoManager.ALLURE_RESULTS_DIR, "*-result.json"))
-        for json_file in json_files:
+    def _normalize_full_name(name) -> str:
+        # allure-pytest: 'tests.test_x.TestA#test_b' (older: '...TestA.test_b'); node ID: 'tests/test_x.py::TestA::test_b[p]'
+        name = name.split("[", 1)[0]
+        return name.replace(".py::", ".").replace("::", ".").replace("/", ".").replace("#", ".")
+
+    @staticmethod
+    def index_results(refresh=False) -> dict:
+        """
+        One pass over *-result.json: {normalized fullName: [(path, name, fullName), ...]}.
+        Built once and reused (test results no longer change at session end); refresh=True rebuilds.
+        """
+        if VideoManager._result_index is not None and not refresh:
+            return VideoManager._result_index
+        index = {}
+        for json_file in glob.glob(os.path.join(Config.ALLURE_RESULTS_DIR, "*-result.json")):
             try:
-                with open(json_file, "r+") as f:
+                with open(json_file, "r") as f:
                     data = json.load(f)
-                    if VideoManager._match_json_to_test(data, node_id):
-                        video_att = {"name": "Test Video", "source": video_filename, "type": "video/mp4"}
-                        target_step = data.get("afters", [])[-1] if data.get("afters") else data
-                        
-                        if "attachments" not in target_step:
-                            target_step["attachments"] = []
-                        
-                        if not any(a['source'] == video_filename for a in target_step.get("attachments", [])):
-                             if isinstance(target_step, list):
-                                 data.setdefault("attachments", []).append(video_att)
-                             else:
-                                 target_step["attachments"].append(video_att)
-                        
-                        f.seek(0)
-                        json.dump(data, f, indent=4)
-                        f.truncate()
-                        return
             except Exception:
                 continue
+            key = VideoManager._normalize_full_name(data.get("fullName", ""))
+            index.setdefault(key, []).append((json_file, data.get("name", ""), data.get("fullName", "")))
+        VideoManager._result_index = index
+        return index
+
+    @staticmethod
+    def _find_result(node_id, index):
+        candidates = index.get(VideoManager._normalize_full_name(node_id), [])
+        if len(candidates) == 1:
+            return candidates[0][0]
+        # Parametrized tests share fullName: the name carries the parameters ('test_b[p]')
+        test_name = node_id.split("::")[-1]
+        for path, name, _ in candidates:
+            if name == test_name:
+                return path
+        if candidates:
+            return candidates[0][0]
+        # Legacy fuzzy match (other allure-pytest naming), on the indexed fields: no file is re-read
+        for entries in index.values():
+            for path, name, full_name in entries:
+                if VideoManager._match_json_to_test({"fullName": full_name, "name": name}, node_id):
+                    return path
+        return None
 
     @staticmethod
-    def _block_until_container_removed(container_id):
+    def inject_video(node_id, video_filename):
+        video_att = {"name": "Test Video", "source": video_filename, "type": "video/mp4"}
+        VideoManager.inject_attachment(node_id, video_att, into_teardown=True)
+
+    @staticmethod
+    def inject_attachment(node_id, attachment, into_teardown=False):
         """
-        [INDUSTRIAL STANDARD]
-        Does not wait for 'Process Exit' only.
-        Locks code execution until 'destroy' (full removal) signal is received from Docker Daemon.
-        This ensures Python never says 'Done' before Selenoid says 'REMOVED'.
+        Patches an attachment (file already in ALLURE_RESULTS_DIR) into the result JSON of a finished test.
+        into_teardown: attach to the last teardown step (if any) instead of the test body.
         """
-        if not container_id:
-            return
-        client = docker.from_env()
-        
-        try:
-            # 1. Check if container still exists
-            try:
-                container = client.containers.get(container_id)
-            except NotFound:
-                # If already deleted, no need to wait
-                VideoManager.logger.info(f"✅ Container already gone: {container_id[:12]}")
-                return
+        return not VideoManager.inject_attachments([(node_id, attachment, into_teardown)])
 
-            VideoManager.logger.info(f"⏳ Awaiting Full Deletion (Event Listener): {container_id[:12]}")
+    @staticmethod
+    def inject_attachments(patches) -> set:
+        """
+        Batch version of inject_attachment: patches = [(node_id, attachment, into_teardown), ...].
+        Each result file is read once and written once (atomic replace, compact JSON).
+        Returns the node IDs without a result file.
+        """
+        by_file, missing = {}, set()
+        index, refreshed = VideoManager.index_results(), False
+        for node_id, attachment, into_teardown in patches:
+            path = VideoManager._find_result(node_id, index)
+            if path is None and not refreshed:
+                # Written after the index was built? Rebuild once per batch.
+                index, refreshed = VideoManager.index_results(refresh=True), True
+                path = VideoManager._find_result(node_id, index)
+            if path is None:
+                missing.add(node_id)
+                continue
+            by_file.setdefault(path, []).append((attachment, into_teardown))
 
-            # 2. First wait for Exit (Just to be safe)
-            container.wait() 
+        for path, file_patches in by_file.items():
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                for attachment, into_teardown in file_patches:
+                    target_step = data["afters"][-1] if into_teardown and data.get("afters") else data
+                    attachments = target_step.setdefault("attachments", [])
+                    if not any(a.get("source") == attachment["source"] for a in attachments):
+                        attachments.append(attachment)
+                handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json.tmp")
+                with os.fdopen(handle, "w") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(temp_path, path)
+            except Exception as e:
+                VideoManager.logger.warning(f"Result Patch Error ({os.path.basename(path)}): {e}")
+        return missing
+
+    @staticmethod
+    def _block_until_containers_removed(container_ids, timeout=None):
+        """
+        [INDUSTRIAL STANDARD]
+        Does not wait for 'Process Exit' only.
+        Locks code execution until 'destroy' (full removal) signal is received from Docker Daemon
+        for every container, over ONE event subscription filtered by all pending IDs.
+        The subscription is opened before the existence check (no missed event) and ends at the
+        deadline (VIDEO_CLEANUP_TIMEOUT). Returns the IDs that never disappeared.
+        """
+        pending = {c_id for c_id in container_ids if c_id}
+        if not pending:
+            return set()
+        timeout = timeout if timeout is not None else Config.VIDEO_CLEANUP_TIMEOUT
+        event_stream = None
 
-            # 3. THE MAIN EVENT: Listen for 'destroy' signal
-            # This process consumes no CPU, waits for push notification over network socket.
+        try:
+            client = docker.from_env()
+            now = time.time()
+            # The daemon closes the stream itself at 'until': no thread, no polling
             event_stream = client.events(
-                filters={'container': container_id, 'event': 'destroy'}, 
+                since=int(now), until=int(now + timeout) + 1,
+                filters={'container': sorted(pending), 'event': 'destroy'},
                 decode=True
             )
-            
-            # This loop won't spin; it waits right there until Docker says "I deleted it".
-            for _ in event_stream:
-                VideoManager.logger.info(f"💣 Destroy Signal Received: {container_id[:12]}")
-                break # Event received, lock released.
-
-        except NotFound:
-            pass # Race condition: Deleted before we started listening.
+
+            # 1. Containers already gone need no wait
+            existing = {c.id for c in client.containers.list(all=True, sparse=True, filters={'id': sorted(pending)})}
+            for c_id in pending - existing:
+                VideoManager.logger.info(f"✅ Container already gone: {c_id[:12]}")
+            pending &= existing
+            if pending:
+                VideoManager.logger.info(f"⏳ Awaiting Full Deletion (Event Listener): {len(pending)} container(s), max {timeout:.0f}s")
+
+            # 2. THE MAIN EVENT: one 'destroy' signal per container releases its wait
+            # This loop won't spin; it waits on the socket until Docker pushes the next event.
+            for event in (event_stream if pending else ()):
+                c_id = event.get("id") or event.get("Actor", {}).get("ID")
+                if c_id in pending:
+                    pending.discard(c_id)
+                    VideoManager.logger.info(f"💣 Destroy Signal Received: {c_id[:12]}")
+                if not pending:
+                    break
         except Exception as e:
             VideoManager.logger.warning(f"Event Wait Error: {e}")
+        finally:
+            if event_stream is not None:
+                event_stream.close()
+
+        if pending:
+            VideoManager.logger.warning(
+                f"⚠️ {len(pending)} container(s) not removed within {timeout:.0f}s: "
+                + ", ".join(c_id[:12] for c_id in sorted(pending))
+            )
+        return pending
 
     @staticmethod
     def post_process_cleanup():
-        if not os.path.exists(VideoManager.CLEANUP_MANIFEST):
+        if not os.path.exists(VideoManager._manifest_path()):
             return
 
         VideoManager.logger.info("🧹 [POST-PROCESS] Starting...")
         manifest_entries = []
         try:
-            with open(VideoManager.CLEANUP_MANIFEST, "r") as f:
+            with open(VideoManager._manifest_path(), "r") as f:
                 for line in f:
                     try:
                         manifest_entries.append(json.loads(line.strip()))
@@ -150,18 +242,21 @@ class VideoManager:
 
         # 1. Waiting Phase (Destroy Event)
         unique_containers = {e.get("container_id") for e in manifest_entries if e.get("container_id")}
-        for c_id in unique_containers:
-            VideoManager._block_until_container_removed(c_id)
+        VideoManager._block_until_containers_removed(unique_containers)
 
         # 2. Processing Phase
-        processed = 0
+        # A reused session records one video for several tests; it survives if any of them keeps it.
+        kept_videos = {e.get("video") for e in manifest_entries if e.get("action") == "keep"}
+        video_patches = []
         deleted = 0
         for entry in manifest_entries:
-            f_path = os.path.join(VideoManager.ALLURE_RESULTS_DIR, entry.get("video"))
+            f_path = os.path.join(Config.ALLURE_RESULTS_DIR, entry.get("video"))
             if entry.get("action") == "keep":
-                VideoManager.inject_video(entry.get("node_id"), entry.get("video"))
-                processed += 1
+                video_att = {"name": "Test Video", "source": entry.get("video"), "type": "video/mp4"}
+                video_patches.append((entry.get("node_id"), video_att, True))
             elif entry.get("action") == "delete":
+                if entry.get("video") in kept_videos:
+                    continue
                 if os.path.exists(f_path):
                     try:
                         os.remove(f_path)
@@ -169,6 +264,10 @@ class VideoManager:
                     except Exception:
                         pass
 
-        if os.path.exists(VideoManager.CLEANUP_MANIFEST):
-            os.remove(VideoManager.CLEANUP_MANIFEST)
+        # One indexed, batched pass over the Allure results for all kept videos
+        missing = VideoManager.inject_attachments(video_patches)
+        processed = len(video_patches) - sum(1 for node_id, _, _ in video_patches if node_id in missing)
+
+        if os.path.exists(VideoManager._manifest_path()):
+            os.remove(VideoManager._manifest_path())
         VideoManager.logger.info(f"✅ Done. Added to Report: {processed} | Deleted: {deleted}")
\ No newline at end of file
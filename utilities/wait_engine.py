@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import logging
+import threading
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from config import Config
+
+class WaitEngine:
+    """
+    [ARCHITECTURE: Central Explicit Waits]
+    1. Implicit waits are OFF (IMPLICIT_WAIT=0): a negative lookup returns at once on every poll
+       instead of stalling for the full implicit timeout (implicit/explicit collision).
+    2. Polling starts at WAIT_POLL seconds and grows by WAIT_BACKOFF up to WAIT_POLL_MAX.
+    3. Every wait is recorded per locator/label into a wait-time histogram (per xdist worker).
+    """
+
+    # Histogram bucket upper bounds in seconds (last bucket = everything above)
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+    logger = logging.getLogger("WaitEngine")
+    _stats = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def until(driver, condition, timeout=None, label="", message="", ignored_exceptions=(NoSuchElementException,)):
+        """
+        Polls 'condition(driver)' until it returns a truthy value (which is returned).
+        Raises TimeoutException like WebDriverWait.
+        """
+        timeout = timeout if timeout is not None else Config.TIMEOUT
+        poll = Config.WAIT_POLL
+        start = time.monotonic()
+        deadline = start + timeout
+        last_error = None
+
+        while True:
+            try:
+                value = condition(driver)
+                if value:
+                    WaitEngine._record(label, time.monotonic() - start, timed_out=False)
+                    return value
+            except ignored_exceptions as e:
+                last_error = e
+
+            now = time.monotonic()
+            if now >= deadline:
+                WaitEngine._record(label, now - start, timed_out=True)
+                detail = f" Last error: {last_error.__class__.__name__}" if last_error else ""
+                raise TimeoutException(message or f"Timed out after {timeout}s waiting for {label}.{detail}")
+
+            time.sleep(min(poll, deadline - now))
+            poll = min(poll * Config.WAIT_BACKOFF, Config.WAIT_POLL_MAX)
+
+    @staticmethod
+    def optional(driver, condition, timeout=None, label="", ignored_exceptions=(NoSuchElementException,)):
+        """Same as until() but returns None instead of raising (elements that may not appear)."""
+        timeout = timeout if timeout is not None else Config.OPTIONAL_WAIT_TIMEOUT
+        try:
+            return WaitEngine.until(driver, condition, timeout, label=label, ignored_exceptions=ignored_exceptions)
+        except TimeoutException:
+            return None
+
+    @staticmethod
+    def _record(label, seconds, timed_out):
+        key = str(label) or "unlabeled"
+        with WaitEngine._lock:
+            entry = WaitEngine._stats.setdefault(key, {
+                "count": 0,
+                "timeouts": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "histogram": [0] * (len(WaitEngine.BUCKETS) + 1),
+            })
+            entry["count"] += 1
+            entry["timeouts"] += int(timed_out)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            bucket = next((i for i, bound in enumerate(WaitEngine.BUCKETS) if seconds <= bound), len(WaitEngine.BUCKETS))
+            entry["histogram"][bucket] += 1
+
+    @staticmethod
+    def write_report():
+        """Writes this worker's histograms as JSON and logs the locators that burn the most time."""
+        with WaitEngine._lock:
+            stats = {key: dict(value) for key, value in WaitEngine._stats.items()}
+        if not stats:
+            return
+
+        worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+        report = {
+            "worker": worker,
+            "buckets": [f"<={b}s" for b in WaitEngine.BUCKETS] + [f">{WaitEngine.BUCKETS[-1]}s"],
+            "locators": stats,
+        }
+        path = os.path.join(Config.ALLURE_RESULTS_DIR, f"wait_stats_{worker}.json")
+        try:
+            with open(path, "w") as f:
+                json.dump(report, f)
+        except Exception as e:
+            WaitEngine.logger.warning(f"Wait Stats Write Error: {e}")
+
+        slowest = sorted(stats.items(), key=lambda item: item[1]["total_seconds"], reverse=True)[:5]
+        for key, value in slowest:
+            WaitEngine.logger.info(
+                f"⏱️ {value['total_seconds']:.2f}s total | {value['count']} waits | {value['timeouts']} timeouts <- {key}"
+            )